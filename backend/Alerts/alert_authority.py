@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Dict, Optional
 import smtplib
 from email.mime.text import MIMEText
@@ -9,6 +9,12 @@ import json
 
 from Database.schema import Complaint, User, CaseActivity, Notification, ActionType, CaseStatus
 from Database.database import DatabaseManager
+from Alerts.dispatcher import ChannelDispatcher, alert_dispatcher
+from Alerts.pattern_counters import pattern_counters
+from Alerts.mule_network import mule_network, MULE_CLUSTER_MIN_SIZE
+# Publishes the bank actions and case activity written here, also from the
+# standalone notification worker and alert sweeper processes
+import Database.change_feed  # noqa: F401
 
 class AlertAuthorities:
     """
@@ -43,47 +49,95 @@ class AlertAuthorities:
     GOLDEN_HOUR_MINUTES = 60
     CRITICAL_FRAUD_TYPES = ["UPI_SCAM", "PHISHING", "INVESTMENT_FRAUD"]
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, dispatcher: Optional[ChannelDispatcher] = None):
         self.db = db
+        self.dispatcher = dispatcher or alert_dispatcher
+        # Deliveries submitted by the alert currently being prepared.
+        # None means email/SMS calls are sent inline (single-alert endpoints).
+        self._deliveries = None
     
     def trigger_alerts(self, complaint_id: str) -> Dict[str, bool]:
         """
         Main function to trigger appropriate alerts based on complaint parameters.
         Returns dict of alert types and their success status.
+        
+        Database bookkeeping for each alert runs in order on this session and is
+        committed once, while the email/SMS/I4C calls are fanned out through the
+        channel dispatcher and awaited together at the end.
         """
         complaint = DatabaseManager.get_complaint_by_id(self.db, complaint_id)
         if not complaint:
             return {"error": "Complaint not found"}
         
-        alerts_sent = {}
-        
-        # 1. Golden Hour Alert (within 1 hour of fraud)
-        if self._is_golden_hour(complaint):
-            alerts_sent['golden_hour'] = self._send_golden_hour_alert(complaint)
-        
-        # 2. High Amount Alert (> ₹1 Lakh)
-        if complaint.amount_lost >= self.HIGH_AMOUNT_THRESHOLD:
-            alerts_sent['high_amount'] = self._send_high_amount_alert(complaint)
-        
-        # 3. Bank Freeze Request
-        if complaint.accused_account:
-            alerts_sent['bank_freeze'] = self._send_bank_freeze_request(complaint)
-        
-        # 4. I4C/CFCFRMS Integration
-        alerts_sent['i4c_sync'] = self._sync_with_i4c(complaint)
+        prepared = {}
         
-        # 5. Local Police Station Alert
-        alerts_sent['police_station'] = self._alert_police_station(complaint)
-        
-        # 6. District Cyber Cell
-        alerts_sent['district_cyber_cell'] = self._alert_district_cyber_cell(complaint)
+        # All bookkeeping below is one transaction, committed before waiting
+        # on deliveries; each alert's writes sit in their own savepoint
+        with DatabaseManager.unit_of_work(self.db):
+            # Keeps the alert sweeper from alerting this complaint again
+            if complaint.alerts_triggered_at is None:
+                complaint.alerts_triggered_at = datetime.utcnow()
+            
+            # 1. Golden Hour Alert (within 1 hour of fraud)
+            if self._is_golden_hour(complaint):
+                prepared['golden_hour'] = self._prepare(self._send_golden_hour_alert, complaint)
+            
+            # 2. High Amount Alert (> ₹1 Lakh)
+            if complaint.amount_lost >= self.HIGH_AMOUNT_THRESHOLD:
+                prepared['high_amount'] = self._prepare(self._send_high_amount_alert, complaint)
+            
+            # 3. Bank Freeze Request
+            if complaint.accused_account:
+                prepared['bank_freeze'] = self._prepare(self._send_bank_freeze_request, complaint)
+            
+            # 4. I4C/CFCFRMS Integration
+            prepared['i4c_sync'] = self._prepare(self._sync_with_i4c, complaint)
+            
+            # 5. Local Police Station Alert
+            prepared['police_station'] = self._prepare(self._alert_police_station, complaint)
+            
+            # 6. District Cyber Cell
+            prepared['district_cyber_cell'] = self._prepare(self._alert_district_cyber_cell, complaint)
+            
+            # 7. Pattern Detection Alert (if multiple similar cases)
+            if self._detect_pattern(complaint):
+                prepared['pattern_alert'] = self._prepare(self._send_pattern_alert, complaint)
         
-        # 7. Pattern Detection Alert (if multiple similar cases)
-        if self._detect_pattern(complaint):
-            alerts_sent['pattern_alert'] = self._send_pattern_alert(complaint)
+        # Wait for every channel at once; an alert succeeds only if its
+        # bookkeeping and all of its deliveries succeeded
+        alerts_sent = {}
+        for alert_type, (success, deliveries) in prepared.items():
+            alerts_sent[alert_type] = success and all(self.dispatcher.wait(deliveries))
         
         return alerts_sent
     
+    def _prepare(self, send_alert, complaint: Complaint):
+        """
+        Run one alert with deliveries deferred to the dispatcher. Its database
+        writes are kept only if the alert succeeds, without affecting the others.
+        """
+        self._deliveries = []
+        savepoint = self.db.begin_nested()
+        try:
+            success = send_alert(complaint)
+            if success:
+                savepoint.commit()
+            else:
+                savepoint.rollback()
+            return success, self._deliveries
+        except Exception:
+            savepoint.rollback()
+            raise
+        finally:
+            self._deliveries = None
+    
+    def _dispatch(self, channel: str, deliver, *args, **kwargs) -> bool:
+        """Send now, or hand off to the dispatcher while trigger_alerts is fanning out"""
+        if self._deliveries is None:
+            return deliver(*args, **kwargs)
+        self._deliveries.append(self.dispatcher.submit(channel, deliver, *args, **kwargs))
+        return True
+    
     def _is_golden_hour(self, complaint: Complaint) -> bool:
         """Check if complaint is within golden hour (1 hour of fraud)"""
         if not complaint.transaction_date:
@@ -103,6 +157,7 @@ Fraud Type: {complaint.fraud_type.value}
 Time Since Fraud: {(datetime.utcnow() - complaint.transaction_date).seconds // 60} minutes
 
 Accused Account: {complaint.accused_account}
+Accused UPI: {complaint.accused_upi or 'N/A'}
 Accused Bank: {complaint.accused_bank}
 Transaction ID: {complaint.transaction_id}
 
@@ -211,9 +266,8 @@ This case requires senior officer attention due to high amount involved.
                 priority="high"
             )
             
-            # Update complaint
+            # Update complaint (saved with the notification below)
             complaint.is_funds_frozen = True
-            self.db.commit()
             
             # Send notification to victim
             DatabaseManager.send_notification(self.db, {
@@ -250,14 +304,9 @@ This case requires senior officer attention due to high amount involved.
                 "timestamp": complaint.reported_at.isoformat()
             }
             
-            # API call to I4C (mock for now)
-            # response = requests.post(
-            #     self.AUTHORITIES['I4C_NATIONAL']['api_endpoint'],
-            #     json=i4c_data,
-            #     headers={"Authorization": "Bearer <token>"}
-            # )
+            self._dispatch("i4c", self._post_to_i4c, i4c_data)
             
-            # For now, log the sync
+            # Log the sync
             DatabaseManager.add_case_activity(self.db, {
                 "complaint_id": complaint.id,
                 "action_type": ActionType.COMPLAINT_REGISTERED,
@@ -321,16 +370,22 @@ Case Details: View at https://cyberfraud.odisha.gov.in/case/{complaint.complaint
     
     def _detect_pattern(self, complaint: Complaint) -> bool:
         """Detect if this complaint is part of a larger pattern/gang activity"""
-        # Check for similar cases in last 7 days
-        week_ago = datetime.utcnow() - timedelta(days=7)
+        # Similar cases in the last 7 days sharing the accused account,
+        # UPI handle or account + bank - a counter lookup, no table scan
+        similar_cases = pattern_counters.similar_cases(complaint)
+        if max(similar_cases.values(), default=0) >= 2:  # 3 or more cases with same accused
+            return True
         
-        similar_cases = self.db.query(Complaint).filter(
-            Complaint.accused_account == complaint.accused_account,
-            Complaint.created_at >= week_ago,
-            Complaint.id != complaint.id
-        ).count()
+        # Opt-in (PATTERN_CONFIRM_IN_DATABASE): per-process counters miss
+        # complaints filed through other workers, so re-count the same keys
+        if pattern_counters.needs_confirmation:
+            similar_cases = pattern_counters.database_similar_cases(self.db, complaint)
+            if max(similar_cases.values(), default=0) >= 2:
+                return True
         
-        return similar_cases >= 2  # 3 or more cases with same accused account
+        # Or linked to a mule network through any shared identifier, at any time
+        mule_network.ensure(self.db, complaint.complaint_id)
+        return mule_network.cluster_size(complaint.complaint_id) >= MULE_CLUSTER_MIN_SIZE
     
     def _send_pattern_alert(self, complaint: Complaint) -> bool:
         """Alert about detected fraud pattern/organized gang"""
@@ -340,8 +395,11 @@ Case Details: View at https://cyberfraud.odisha.gov.in/case/{complaint.complaint
 
 Multiple complaints detected with similar characteristics:
 Accused Account: {complaint.accused_account}
+Accused UPI: {complaint.accused_upi or 'N/A'}
 Bank: {complaint.accused_bank}
 
+Linked complaints (shared accounts/UPI/transactions): {mule_network.cluster_size(complaint.complaint_id)}
+
 This may indicate organized fraud gang activity.
 Recommend immediate investigation and inter-district coordination.
 
@@ -362,15 +420,40 @@ Amount: ₹{complaint.amount_lost:,.2f}
             
             # Mark as priority case
             complaint.is_priority = True
-            self.db.commit()
+            DatabaseManager.save(self.db)
             
             return True
         except Exception as e:
             print(f"Pattern alert failed: {e}")
             return False
     
+    def _post_to_i4c(self, i4c_data: Dict) -> bool:
+        """Push complaint data to the I4C API"""
+        try:
+            # API call to I4C (mock for now)
+            # response = requests.post(
+            #     self.AUTHORITIES['I4C_NATIONAL']['api_endpoint'],
+            #     json=i4c_data,
+            #     headers={"Authorization": "Bearer <token>"},
+            #     timeout=self.dispatcher.call_timeout
+            # )
+            print(f"I4C SYNC: {i4c_data['complaint_id']}")
+            return True
+        except Exception as e:
+            print(f"I4C API call failed: {e}")
+            return False
+    
     def _send_email(self, recipients: List[str], subject: str, body: str, priority: str = "normal"):
         """Send email notification"""
+        return self._dispatch("email", self._deliver_email, recipients, subject, body, priority)
+    
+    def _send_sms(self, phone: str, message: str):
+        """Send SMS alert"""
+        return self._dispatch("sms", self._deliver_sms, phone, message)
+    
+    def _deliver_email(self, recipients: List[str], subject: str, body: str, priority: str = "normal",
+                       reference: Optional[str] = None):
+        """Deliver an email over SMTP; reference comes back on the delivery receipt"""
         try:
             # Configure SMTP (use government mail server)
             # For testing, you can use Gmail or other SMTP
@@ -382,6 +465,8 @@ Amount: ₹{complaint.amount_lost:,.2f}
             if priority == "high":
                 msg['X-Priority'] = '1'
                 msg['Importance'] = 'high'
+            if reference:
+                msg['X-Notification-Id'] = reference
             
             msg.attach(MIMEText(body, 'plain'))
             
@@ -389,7 +474,7 @@ Amount: ₹{complaint.amount_lost:,.2f}
             print(f"EMAIL SENT: {subject} to {recipients}")
             
             # Actual SMTP code:
-            # server = smtplib.SMTP('smtp.gov.in', 587)
+            # server = smtplib.SMTP('smtp.gov.in', 587, timeout=self.dispatcher.call_timeout)
             # server.starttls()
             # server.login("username", "password")
             # server.send_message(msg)
@@ -400,8 +485,8 @@ Amount: ₹{complaint.amount_lost:,.2f}
             print(f"Email send failed: {e}")
             return False
     
-    def _send_sms(self, phone: str, message: str):
-        """Send SMS alert"""
+    def _deliver_sms(self, phone: str, message: str, reference: Optional[str] = None):
+        """Deliver an SMS through the gateway; reference comes back on the delivery receipt"""
         try:
             # Mock SMS for now
             print(f"SMS SENT to {phone}: {message}")
@@ -409,7 +494,8 @@ Amount: ₹{complaint.amount_lost:,.2f}
             # Actual SMS API call:
             # response = requests.post(
             #     "https://sms.gov.in/api/send",
-            #     json={"phone": phone, "message": message}
+            #     json={"phone": phone, "message": message, "reference": reference},
+            #     timeout=self.dispatcher.call_timeout
             # )
             
             return True
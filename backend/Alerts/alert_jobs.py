@@ -0,0 +1,236 @@
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from threading import Condition, Thread
+from typing import Deque, Dict, List, Optional
+from uuid import uuid4
+import heapq
+import itertools
+import os
+
+from Database.database import SessionLocal
+from Alerts.alert_authority import AlertAuthorities
+
+
+class AlertJobQueue:
+    """
+    In-process priority scheduler that runs AlertAuthorities.trigger_alerts
+    outside the request.
+
+    Jobs are ordered by urgency rather than arrival:
+
+        golden_hour   fraud still inside its golden hour; least time
+                      remaining first, then highest amount_lost
+        standard      everything else; highest amount_lost first
+
+    A golden-hour job whose window closes while it waits is demoted to
+    standard when it reaches the front. reserved_workers of the worker
+    threads only take golden-hour jobs, so a backlog of older complaints
+    can never hold up freeze requests for fresh frauds.
+
+    Each job opens its own database session on a worker thread, so the caller
+    only pays for enqueueing and gets a job id back immediately. Finished jobs
+    are kept in a bounded store so their per-alert results can be polled, and
+    queue wait times are tracked per band (see metrics()).
+    """
+
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+    GOLDEN_HOUR = "golden_hour"
+    STANDARD = "standard"
+    BANDS = (GOLDEN_HOUR, STANDARD)
+
+    def __init__(self, max_workers: int = 4, max_jobs: int = 1000, reserved_workers: int = 1,
+                 wait_samples: int = 1000):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.reserved_workers = min(reserved_workers, max(0, max_workers - 1))
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        # (band rank, deadline timestamp, -amount_lost, sequence, job_id)
+        self._heap: List = []
+        self._sequence = itertools.count()
+        self._threads: List[Thread] = []
+        self._stopping = False
+        self._cond = Condition()
+        self._waits: Dict[str, Deque[float]] = {band: deque(maxlen=wait_samples) for band in self.BANDS}
+        self._counts = {band: {"queued": 0, "running": 0, "started": 0} for band in self.BANDS}
+
+    def enqueue(self, complaint_id: str, transaction_date: Optional[datetime] = None,
+                amount_lost: float = 0.0) -> Dict:
+        """Queue alert processing for a complaint and return the job record"""
+        now = datetime.utcnow()
+        deadline = None
+        if transaction_date:
+            deadline = transaction_date + timedelta(minutes=AlertAuthorities.GOLDEN_HOUR_MINUTES)
+        band = self.GOLDEN_HOUR if deadline and deadline > now else self.STANDARD
+        job = {
+            "job_id": uuid4().hex,
+            "complaint_id": complaint_id,
+            "status": self.QUEUED,
+            "priority_band": band,
+            "golden_hour_deadline": deadline,
+            "amount_lost": amount_lost or 0.0,
+            "alerts": None,
+            "error": None,
+            "queued_at": now,
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self._cond:
+            self._jobs[job["job_id"]] = job
+            self._evict_finished()
+            self._push(job)
+            self._start_workers()
+            self._cond.notify_all()
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of a job, or None if unknown/evicted"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def has_pending(self, complaint_id: str) -> bool:
+        """True while a job for the complaint is queued or running"""
+        with self._cond:
+            return any(
+                job["complaint_id"] == complaint_id and job["status"] in (self.QUEUED, self.RUNNING)
+                for job in self._jobs.values()
+            )
+
+    def metrics(self) -> Dict:
+        """Queue depth, running jobs and queue wait percentiles per priority band"""
+        with self._cond:
+            bands = {}
+            for band in self.BANDS:
+                waits = sorted(self._waits[band])
+                bands[band] = {
+                    **self._counts[band],
+                    "wait_seconds": {
+                        "samples": len(waits),
+                        "mean": round(sum(waits) / len(waits), 3) if waits else None,
+                        "p50": round(waits[len(waits) // 2], 3) if waits else None,
+                        "p95": round(waits[int(len(waits) * 0.95)], 3) if waits else None,
+                        "max": round(waits[-1], 3) if waits else None,
+                    },
+                }
+            return {
+                "workers": self.max_workers,
+                "reserved_golden_hour_workers": self.reserved_workers,
+                "queued": len(self._heap),
+                "bands": bands,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and optionally wait for queued and running jobs"""
+        with self._cond:
+            threads, self._threads = self._threads, []
+            self._stopping = True
+            self._cond.notify_all()
+        if wait:
+            for thread in threads:
+                thread.join()
+        with self._cond:
+            self._stopping = False
+
+    def _push(self, job: Dict):
+        rank = self.BANDS.index(job["priority_band"])
+        deadline = job["golden_hour_deadline"].timestamp() if rank == 0 else 0.0
+        heapq.heappush(self._heap, (rank, deadline, -job["amount_lost"], next(self._sequence), job["job_id"]))
+        self._counts[job["priority_band"]]["queued"] += 1
+
+    def _start_workers(self):
+        """Start the worker threads on first use (and again after shutdown)"""
+        if self._threads:
+            return
+        for n in range(self.max_workers):
+            reserved = n < self.reserved_workers
+            thread = Thread(
+                target=self._work, args=(reserved,), daemon=True,
+                name=f"alert-job-{'golden' if reserved else 'general'}-{n}"
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_job(self, reserved: bool) -> Optional[Dict]:
+        """Block until there is a job this worker may run; None once shutting down"""
+        with self._cond:
+            while True:
+                self._demote_expired()
+                if self._heap and (not reserved or self._heap[0][0] == 0):
+                    *_, job_id = heapq.heappop(self._heap)
+                    job = self._jobs[job_id]
+                    band = job["priority_band"]
+                    started = datetime.utcnow()
+                    job.update(status=self.RUNNING, started_at=started)
+                    self._counts[band]["queued"] -= 1
+                    self._counts[band]["running"] += 1
+                    self._counts[band]["started"] += 1
+                    self._waits[band].append((started - job["queued_at"]).total_seconds())
+                    return job
+                if self._stopping:
+                    return None
+                self._cond.wait()
+
+    def _demote_expired(self):
+        """Move golden-hour jobs whose window closed while queued to the standard band"""
+        now = datetime.utcnow()
+        while self._heap and self._heap[0][0] == 0:
+            job = self._jobs[self._heap[0][-1]]
+            if job["golden_hour_deadline"] > now:
+                return
+            heapq.heappop(self._heap)
+            self._counts[self.GOLDEN_HOUR]["queued"] -= 1
+            job["priority_band"] = self.STANDARD
+            self._push(job)
+
+    def _work(self, reserved: bool):
+        while True:
+            job = self._next_job(reserved)
+            if job is None:
+                return
+            self._run(job["job_id"], job["complaint_id"])
+            with self._cond:
+                self._counts[job["priority_band"]]["running"] -= 1
+
+    def _run(self, job_id: str, complaint_id: str):
+        db = SessionLocal()
+        try:
+            result = AlertAuthorities(db).trigger_alerts(complaint_id)
+            if "error" in result:
+                outcome = {"status": self.FAILED, "error": result["error"]}
+            else:
+                outcome = {"status": self.COMPLETED, "alerts": result}
+        except Exception as e:
+            db.rollback()
+            print(f"Alert job {job_id} failed: {e}")
+            outcome = {"status": self.FAILED, "error": str(e)}
+        finally:
+            db.close()
+        self._update(job_id, finished_at=datetime.utcnow(), **outcome)
+
+    def _update(self, job_id: str, **fields):
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def _evict_finished(self):
+        """Drop the oldest finished jobs once the store is over capacity"""
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id]["status"] in (self.COMPLETED, self.FAILED):
+                del self._jobs[job_id]
+
+
+# Shared queue used by the alerts routes
+alert_job_queue = AlertJobQueue(
+    max_workers=int(os.getenv("ALERT_JOB_WORKERS", 4)),
+    max_jobs=int(os.getenv("ALERT_JOB_HISTORY", 1000)),
+    reserved_workers=int(os.getenv("ALERT_JOB_GOLDEN_HOUR_WORKERS", 1))
+)
@@ -0,0 +1,142 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from threading import Event, Thread
+from typing import Dict, Optional
+import argparse
+import os
+
+from Database.database import SessionLocal, DatabaseManager
+from Database.schema import Complaint
+from Alerts.alert_authority import AlertAuthorities
+from Alerts.alert_jobs import AlertJobQueue, alert_job_queue
+
+
+class AlertSweeper:
+    """
+    Auto-triggers alerts for new complaints while their golden hour lasts.
+
+    Every interval (and straight after this process commits a new complaint)
+    the sweeper leases PENDING complaints inside GOLDEN_HOUR_MINUTES that were
+    never alerted (stamping alerts_claimed_at, so other sweepers skip them)
+    and hands them to the alert job scheduler in batches. alerts_triggered_at
+    is set by trigger_alerts itself, so a complaint whose job was lost with
+    its process is claimed again once the lease is lease_minutes old.
+    An idle sweep is a single indexed SELECT ... LIMIT batch_size.
+    """
+
+    def __init__(self, queue: Optional[AlertJobQueue] = None, batch_size: int = 100,
+                 interval: float = 15.0, lease_minutes: float = 10.0):
+        self.queue = queue or alert_job_queue
+        self.batch_size = batch_size
+        self.interval = interval
+        self.lease_minutes = lease_minutes
+        self._stop = Event()
+        self._wake = Event()
+        self._thread: Optional[Thread] = None
+
+    def run_once(self) -> Dict[str, int]:
+        """Claim and enqueue every unalerted golden-hour complaint. Returns counts."""
+        since = datetime.utcnow() - timedelta(minutes=AlertAuthorities.GOLDEN_HOUR_MINUTES)
+        counts = {"claimed": 0, "batches": 0}
+        db = SessionLocal()
+        try:
+            while not self._stop.is_set():
+                batch = DatabaseManager.claim_unalerted_complaints(db, since, self.batch_size, self.lease_minutes)
+                for complaint_id, transaction_date, amount_lost in batch:
+                    # A re-claimed lease whose job is still waiting in this process
+                    if not self.queue.has_pending(complaint_id):
+                        self.queue.enqueue(complaint_id, transaction_date, amount_lost)
+                counts["claimed"] += len(batch)
+                counts["batches"] += 1 if batch else 0
+                if len(batch) < self.batch_size:
+                    break
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return counts
+
+    def run_forever(self):
+        """Sweep every interval, or sooner when wake() is called, until stop()"""
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                counts = self.run_once()
+                if counts["claimed"]:
+                    print(f"Alert sweeper queued {counts['claimed']} golden-hour complaints")
+            except Exception as e:
+                print(f"Alert sweeper error: {e}")
+            self._wake.wait(self.interval)
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        """Run the sweeper on a daemon thread inside this process"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self.run_forever, name="alert-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+def sweeper_from_env() -> AlertSweeper:
+    """Build a sweeper configured from environment variables"""
+    return AlertSweeper(
+        batch_size=int(os.getenv("ALERT_SWEEP_BATCH_SIZE", 100)),
+        interval=float(os.getenv("ALERT_SWEEP_INTERVAL_SECONDS", 15)),
+        lease_minutes=float(os.getenv("ALERT_SWEEP_LEASE_MINUTES", 10)),
+    )
+
+
+# Shared sweeper started by main.py
+alert_sweeper = sweeper_from_env()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_new_complaints(session, flush_context):
+    if any(isinstance(obj, Complaint) for obj in session.new):
+        session.info["complaints_to_sweep"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_for_committed_complaints(session):
+    """Sweep right away instead of waiting out the interval"""
+    # Also fired when a savepoint is released; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    if session.info.pop("complaints_to_sweep", False):
+        alert_sweeper.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_complaints(session):
+    if session.in_nested_transaction():
+        return  # only a savepoint; the transaction is still open
+    session.info.pop("complaints_to_sweep", None)
+
+
+if __name__ == "__main__":
+    # Run as a standalone process: python -m Alerts.alert_sweeper
+    parser = argparse.ArgumentParser(description="Auto-trigger alerts for golden-hour complaints")
+    parser.add_argument("--once", action="store_true", help="Sweep once, wait for the alerts and exit")
+    args = parser.parse_args()
+
+    if args.once:
+        print(alert_sweeper.run_once())
+        alert_job_queue.shutdown(wait=True)
+    else:
+        print("Alert sweeper started")
+        try:
+            alert_sweeper.run_forever()
+        except KeyboardInterrupt:
+            print("Alert sweeper stopped")
+            alert_job_queue.shutdown(wait=True)
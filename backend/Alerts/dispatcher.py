@@ -0,0 +1,97 @@
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from threading import Event, Lock
+from typing import Callable, Dict, List, Optional
+import os
+import time
+
+
+class ChannelDispatcher:
+    """
+    Fan-out executor for alert deliveries (email, SMS, I4C).
+
+    Every channel gets its own bounded thread pool, so a slow SMTP server can
+    only tie up the email workers and never delays an SMS. Callers submit all
+    deliveries first and then wait once, so the total latency is close to the
+    slowest call instead of the sum of all calls.
+
+    call_timeout runs from the moment a worker starts the call, not from
+    submit, so time spent queued behind other deliveries is not held against
+    it. Waiting cannot stop a thread; delivery functions pass call_timeout to
+    their socket/HTTP clients so a hung gateway call also ends and frees its
+    thread.
+    """
+
+    def __init__(self, channel_limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = 4, call_timeout: float = 10.0):
+        self.channel_limits = channel_limits or {}
+        self.default_limit = default_limit
+        self.call_timeout = call_timeout
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = Lock()
+
+    def submit(self, channel: str, fn: Callable, *args, **kwargs) -> Future:
+        """Run fn on the channel's pool; the future records when the call started"""
+        started = Event()
+        started_at = []
+
+        def run():
+            started_at.append(time.monotonic())
+            started.set()
+            return fn(*args, **kwargs)
+
+        future = self._executor(channel).submit(run)
+        # Also released if the call is cancelled before a worker picks it up
+        future.add_done_callback(lambda _: started.set())
+        future.started = started
+        future.started_at = started_at
+        future.channel = channel
+        return future
+
+    def wait(self, futures: List[Future]) -> List[bool]:
+        """
+        Wait for submitted deliveries and return their success flags.
+        A call that raises or runs longer than call_timeout counts as failed.
+        """
+        results = []
+        for future in futures:
+            future.started.wait()
+            started_at = future.started_at[0] if future.started_at else time.monotonic()
+            remaining = max(0.0, started_at + self.call_timeout - time.monotonic())
+            try:
+                results.append(bool(future.result(timeout=remaining)))
+            except FutureTimeout:
+                print(f"{future.channel} delivery timed out after {self.call_timeout}s")
+                results.append(False)
+            except Exception as e:
+                print(f"{future.channel} delivery failed: {e}")
+                results.append(False)
+        return results
+
+    def shutdown(self, wait: bool = True):
+        """Shut down every channel pool"""
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=wait)
+
+    def _executor(self, channel: str) -> ThreadPoolExecutor:
+        with self._lock:
+            executor = self._executors.get(channel)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=self.channel_limits.get(channel, self.default_limit),
+                    thread_name_prefix=f"alert-{channel}"
+                )
+                self._executors[channel] = executor
+            return executor
+
+
+# Shared dispatcher used by AlertAuthorities
+alert_dispatcher = ChannelDispatcher(
+    channel_limits={
+        "email": int(os.getenv("ALERT_EMAIL_CONCURRENCY", 8)),
+        "sms": int(os.getenv("ALERT_SMS_CONCURRENCY", 4)),
+        "i4c": int(os.getenv("ALERT_I4C_CONCURRENCY", 2)),
+    },
+    call_timeout=float(os.getenv("ALERT_CALL_TIMEOUT_SECONDS", 10))
+)
@@ -0,0 +1,363 @@
+"""
+Mule-network clustering.
+
+Complaints are linked whenever they share an identifier of the accused - an
+account number, a UPI handle or a transaction id - and the linked groups are
+kept as connected components in a union-find structure. Adding a complaint is
+near-constant time, and a complaint's cluster (its size, total loss and
+members) is read without touching the database. Placeholder values ("NA",
+"0", ...) never link complaints, and an identifier stops linking once
+MULE_IDENTIFIER_MAX_COMPLAINTS complaints share it (a payment gateway's
+account, not a mule).
+
+The structure lives in memory: it is loaded from the complaints table the
+first time a worker needs it, extended whenever a session commits new
+complaints, and catches up with complaints committed by other workers and
+processes by seeking past a (created_at, id) high-water mark, at most every
+MULE_SYNC_SECONDS. A complaint whose transaction committed after newer ones
+were read sits below the mark; ensure() adds it when it is asked for. It can
+be rebuilt from scratch at any time. The batch job also flags every
+complaint in a large cluster as a priority case:
+
+    python -m Alerts.mule_network [--min-size N] [--flag-priority]
+"""
+from sqlalchemy import event, select, tuple_, update
+from sqlalchemy.orm import Session
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import os
+import re
+import time
+
+from Database.schema import Complaint
+from Alerts.pattern_counters import normalize_account, normalize_upi
+
+# Complaints in a cluster of at least this size are treated as network activity
+MULE_CLUSTER_MIN_SIZE = int(os.getenv("MULE_CLUSTER_MIN_SIZE", 3))
+# An identifier shared by more complaints than this stops linking new ones
+MULE_IDENTIFIER_MAX_COMPLAINTS = int(os.getenv("MULE_IDENTIFIER_MAX_COMPLAINTS", 200))
+# Minimum seconds between catch-up reads of complaints committed elsewhere
+MULE_SYNC_SECONDS = float(os.getenv("MULE_SYNC_SECONDS", 5))
+
+_LINK_COLUMNS = (Complaint.complaint_id, Complaint.accused_account, Complaint.accused_upi,
+                 Complaint.transaction_id, Complaint.amount_lost)
+
+# Values feeds use for "not known"; compared after normalisation
+PLACEHOLDERS = {"NA", "NIL", "NULL", "NONE", "UNKNOWN", "NOTAVAILABLE", "TBD", "XXXX"}
+MIN_IDENTIFIER_LENGTH = 6
+
+
+def _meaningful(value: str) -> bool:
+    """False for placeholders, repeated characters (0000, XXXXXX) and values too short to identify anyone"""
+    plain = re.sub(r"[^0-9A-Za-z]", "", value).upper()
+    return len(plain) >= MIN_IDENTIFIER_LENGTH and plain not in PLACEHOLDERS and len(set(plain)) > 1
+
+
+def link_keys(accused_account: Optional[str], accused_upi: Optional[str],
+              transaction_id: Optional[str]) -> List[str]:
+    """Identifiers of the accused through which a complaint joins others"""
+    keys = []
+    account = normalize_account(accused_account)
+    if account and _meaningful(account):
+        keys.append(f"account:{account}")
+    upi = normalize_upi(accused_upi)
+    if upi and "@" in upi and _meaningful(upi.split("@")[0]):
+        keys.append(f"upi:{upi}")
+    if transaction_id:
+        txn = re.sub(r"\s+", "", transaction_id).upper()
+        if txn and _meaningful(txn):
+            keys.append(f"txn:{txn}")
+    return list(dict.fromkeys(keys))
+
+
+class _Forest:
+    """Union-find over complaint and identifier nodes with per-root aggregates"""
+
+    def __init__(self, max_uses: int = MULE_IDENTIFIER_MAX_COMPLAINTS):
+        self.parent: Dict[str, str] = {}
+        self.members: Dict[str, List[str]] = {}      # root -> complaint_ids
+        self.identifiers: Dict[str, List[str]] = {}  # root -> identifier keys
+        self.loss: Dict[str, float] = {}             # root -> total amount lost
+        self.uses: Dict[str, int] = {}               # identifier key -> complaints seen
+        self.max_uses = max_uses
+
+    def find(self, node: str) -> str:
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]  # path halving
+            node = parent[node]
+        return node
+
+    def union(self, a: str, b: str) -> str:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        # Attach the smaller component, and move its smaller lists
+        if len(self.members[root_a]) + len(self.identifiers[root_a]) < \
+                len(self.members[root_b]) + len(self.identifiers[root_b]):
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.members[root_a].extend(self.members.pop(root_b))
+        self.identifiers[root_a].extend(self.identifiers.pop(root_b))
+        self.loss[root_a] += self.loss.pop(root_b)
+        return root_a
+
+    def add(self, complaint_id: str, keys: Iterable[str], amount_lost: Optional[float]):
+        node = f"complaint:{complaint_id}"
+        if node in self.parent:
+            return
+        self.parent[node] = node
+        self.members[node] = [complaint_id]
+        self.identifiers[node] = []
+        self.loss[node] = amount_lost or 0.0
+        for key in keys:
+            self.uses[key] = self.uses.get(key, 0) + 1
+            if self.uses[key] > self.max_uses:
+                # Too common to point at one network
+                continue
+            if key not in self.parent:
+                self.parent[key] = key
+                self.members[key] = []
+                self.identifiers[key] = [key]
+                self.loss[key] = 0.0
+            self.union(node, key)
+
+
+class MuleNetwork:
+    """Thread-safe connected components of complaints sharing identifiers"""
+
+    def __init__(self, sync_seconds: float = MULE_SYNC_SECONDS):
+        self._forest = _Forest()
+        self._replay: Optional[List] = None
+        self._lock = Lock()
+        self._rebuild_lock = Lock()
+        self.sync_seconds = sync_seconds
+        self._loaded = False
+        # (created_at, id) of the newest complaint read from the table
+        self._high_water: Optional[Tuple[datetime, int]] = None
+        self._checked_at = 0.0
+
+    def add_complaint(self, complaint_id: str, keys: Iterable[str], amount_lost: Optional[float]):
+        keys = list(keys)
+        with self._lock:
+            self._forest.add(complaint_id, keys, amount_lost)
+            if self._replay is not None:
+                self._replay.append((complaint_id, keys, amount_lost))
+
+    def cluster_size(self, complaint_id: str) -> int:
+        node = f"complaint:{complaint_id}"
+        with self._lock:
+            if node not in self._forest.parent:
+                return 0
+            return len(self._forest.members[self._forest.find(node)])
+
+    def cluster(self, complaint_id: str, limit: int = 100) -> Optional[Dict]:
+        """A complaint's cluster, or None if the complaint is unknown"""
+        node = f"complaint:{complaint_id}"
+        with self._lock:
+            forest = self._forest
+            if node not in forest.parent:
+                return None
+            root = forest.find(node)
+            members = forest.members[root]
+            identifiers = forest.identifiers[root]
+            return {
+                "complaint_id": complaint_id,
+                "cluster_size": len(members),
+                "total_amount_lost": forest.loss[root],
+                "is_network": len(members) >= MULE_CLUSTER_MIN_SIZE,
+                "shared_identifiers": identifiers[:limit],
+                "complaints": members[:limit],
+                "truncated": len(members) > limit or len(identifiers) > limit,
+            }
+
+    def large_clusters(self, min_size: int = MULE_CLUSTER_MIN_SIZE) -> List[Dict]:
+        """Every cluster with at least min_size complaints, largest first"""
+        with self._lock:
+            forest = self._forest
+            clusters = [
+                {"cluster_size": len(members), "total_amount_lost": forest.loss[root],
+                 "complaints": list(members), "shared_identifiers": list(forest.identifiers[root])}
+                for root, members in forest.members.items()
+                if len(members) >= min_size
+            ]
+        return sorted(clusters, key=lambda c: c["cluster_size"], reverse=True)
+
+    def contains(self, complaint_id: str) -> bool:
+        with self._lock:
+            return f"complaint:{complaint_id}" in self._forest.parent
+
+    def catch_up(self, db: Session, force: bool = False) -> int:
+        """
+        Add complaints committed by other workers and processes since the last
+        read, seeking past the high-water mark on ix_complaints_created_at_id.
+        The first call loads every complaint. Later calls run at most every
+        sync_seconds unless forced. Returns the number of rows read.
+        """
+        if not self._loaded:
+            return self._load(db)
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.sync_seconds:
+            return 0
+        self._checked_at = now
+        query = select(*_LINK_COLUMNS, Complaint.created_at, Complaint.id)
+        high_water = self._high_water
+        if high_water is not None:
+            query = query.where(tuple_(Complaint.created_at, Complaint.id) > high_water)
+        rows = db.execute(query.order_by(Complaint.created_at, Complaint.id)).all()
+        newest = None
+        for complaint_id, accused_account, accused_upi, transaction_id, amount, created_at, row_id in rows:
+            # Already-known complaints are skipped by the forest
+            self.add_complaint(complaint_id, link_keys(accused_account, accused_upi, transaction_id), amount)
+            if created_at is not None:
+                newest = (created_at, row_id)
+        self._advance(newest)
+        return len(rows)
+
+    def ensure(self, db: Session, complaint_id: str) -> bool:
+        """
+        Catch up and make sure complaint_id is in the forest, reading it
+        directly if it committed below the high-water mark. False if no such
+        complaint exists.
+        """
+        self.catch_up(db)
+        if self.contains(complaint_id):
+            return True
+        self.catch_up(db, force=True)
+        if self.contains(complaint_id):
+            return True
+        row = db.execute(select(*_LINK_COLUMNS).where(Complaint.complaint_id == complaint_id)).first()
+        if row is None:
+            return False
+        complaint_id, accused_account, accused_upi, transaction_id, amount = row
+        self.add_complaint(complaint_id, link_keys(accused_account, accused_upi, transaction_id), amount)
+        return True
+
+    def rebuild(self, db: Session) -> Dict:
+        """Recompute every cluster from the complaints table and swap it in"""
+        with self._rebuild_lock:
+            return self._rebuild(db)
+
+    def _load(self, db: Session) -> int:
+        """First use in this worker: load every complaint, once"""
+        with self._rebuild_lock:
+            if self._loaded:
+                return 0
+            return self._rebuild(db)["complaints"]
+
+    def _advance(self, newest: Optional[Tuple[datetime, int]]):
+        with self._lock:
+            if newest is not None and (self._high_water is None or newest > self._high_water):
+                self._high_water = newest
+
+    def _rebuild(self, db: Session) -> Dict:
+        forest = _Forest()
+        with self._lock:
+            self._replay = []
+        rows = db.execute(
+            select(*_LINK_COLUMNS, Complaint.created_at, Complaint.id)
+            .order_by(Complaint.id)
+            .execution_options(yield_per=5000)
+        )
+        loaded = 0
+        newest = None
+        for complaint_id, accused_account, accused_upi, transaction_id, amount, created_at, row_id in rows:
+            forest.add(complaint_id, link_keys(accused_account, accused_upi, transaction_id), amount)
+            if created_at is not None and (newest is None or (created_at, row_id) > newest):
+                newest = (created_at, row_id)
+            loaded += 1
+        with self._lock:
+            # Complaints committed while the rebuild was reading
+            for args in self._replay or ():
+                forest.add(*args)
+            self._replay = None
+            self._forest = forest
+            self._high_water = newest
+            self._loaded = True
+            self._checked_at = time.monotonic()
+        clusters = sum(1 for members in forest.members.values() if len(members) >= MULE_CLUSTER_MIN_SIZE)
+        print(f"Mule network rebuilt from {loaded} complaints ({clusters} network clusters)")
+        return {"complaints": loaded, "network_clusters": clusters}
+
+    def flag_priority(self, db: Session, min_size: int = MULE_CLUSTER_MIN_SIZE) -> int:
+        """Mark complaints in clusters of at least min_size as priority. Does not commit."""
+        complaint_ids = [cid for cluster in self.large_clusters(min_size) for cid in cluster["complaints"]]
+        flagged = 0
+        for start in range(0, len(complaint_ids), 500):
+            result = db.execute(
+                update(Complaint)
+                .where(Complaint.complaint_id.in_(complaint_ids[start:start + 500]),
+                       Complaint.is_priority.is_not(True))
+                .values(is_priority=True)
+                .execution_options(synchronize_session=False)
+            )
+            flagged += result.rowcount
+        return flagged
+
+
+# Shared clusters used by the alert routes and AlertAuthorities
+mule_network = MuleNetwork()
+
+
+def track_new_complaints(session: Session, complaints: Iterable[Complaint]):
+    """
+    Link complaints once session commits. ORM inserts are tracked
+    automatically; bulk Core inserts (Database.ingest) pass them here.
+    """
+    pending = session.info.setdefault("new_complaint_links", [])
+    for complaint in complaints:
+        pending.append((
+            complaint.complaint_id,
+            link_keys(complaint.accused_account, complaint.accused_upi, complaint.transaction_id),
+            complaint.amount_lost
+        ))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_new_complaints(session, flush_context):
+    new_complaints = [obj for obj in session.new if isinstance(obj, Complaint)]
+    if new_complaints:
+        track_new_complaints(session, new_complaints)
+
+
+@event.listens_for(Session, "after_commit")
+def _link_committed_complaints(session):
+    # Also fired when a savepoint is released; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    for complaint_id, keys, amount_lost in session.info.pop("new_complaint_links", ()):
+        mule_network.add_complaint(complaint_id, keys, amount_lost)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_complaints(session):
+    if session.in_nested_transaction():
+        return  # only a savepoint; the transaction is still open
+    session.info.pop("new_complaint_links", None)
+
+
+if __name__ == "__main__":
+    from Database.database import SessionLocal, migrate_db
+
+    parser = argparse.ArgumentParser(description="Rebuild mule-network clusters from complaints")
+    parser.add_argument("--min-size", type=int, default=MULE_CLUSTER_MIN_SIZE,
+                        help="Complaints needed for a cluster to count as a network")
+    parser.add_argument("--flag-priority", action="store_true",
+                        help="Mark complaints in network clusters as priority cases")
+    args = parser.parse_args()
+
+    migrate_db()
+    db = SessionLocal()
+    try:
+        mule_network.rebuild(db)
+        for cluster in mule_network.large_clusters(args.min_size)[:20]:
+            print(f"{cluster['cluster_size']:>5} complaints  ₹{cluster['total_amount_lost']:>14,.2f}  "
+                  f"{', '.join(cluster['shared_identifiers'][:3])}")
+        if args.flag_priority:
+            flagged = mule_network.flag_priority(db, args.min_size)
+            db.commit()
+            print(f"Flagged {flagged} complaints as priority")
+    finally:
+        db.close()
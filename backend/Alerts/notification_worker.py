@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from threading import Event, Thread
+from typing import Dict, Optional
+import argparse
+import os
+import random
+
+from Database.database import SessionLocal, DatabaseManager
+from Alerts.alert_authority import AlertAuthorities
+from Alerts.dispatcher import ChannelDispatcher, alert_dispatcher
+
+
+class NotificationWorker:
+    """
+    Delivery worker for the Notification outbox.
+
+    Claims due PENDING rows in batches, delivers them through the alert
+    dispatcher and records the outcome. Failed deliveries are retried with
+    exponential backoff until max_attempts, after which the row is FAILED.
+    Rows claimed by a worker that dies are re-claimed when their lease expires.
+    """
+
+    CHANNELS = {"SMS": "sms", "EMAIL": "email"}
+
+    def __init__(self, batch_size: int = 50, lease_seconds: int = 60,
+                 max_attempts: int = 5, backoff_base: float = 30.0,
+                 backoff_max: float = 3600.0, poll_interval: float = 2.0,
+                 dispatcher: Optional[ChannelDispatcher] = None):
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.poll_interval = poll_interval
+        self.dispatcher = dispatcher or alert_dispatcher
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def run_once(self) -> Dict[str, int]:
+        """Claim and deliver one batch. Returns counts by outcome."""
+        db = SessionLocal()
+        try:
+            batch = DatabaseManager.claim_notifications(db, self.batch_size, self.lease_seconds)
+            if not batch:
+                return {"claimed": 0, "sent": 0, "retried": 0, "failed": 0}
+
+            alerter = AlertAuthorities(db, self.dispatcher)
+            futures = [self._submit(alerter, n) for n in batch]
+            results = self.dispatcher.wait([f for f in futures if f is not None])
+
+            counts = {"claimed": len(batch), "sent": 0, "retried": 0, "failed": 0}
+            outcomes = iter(results)
+            for notification, future in zip(batch, futures):
+                success = next(outcomes) if future is not None else False
+                if success:
+                    DatabaseManager.mark_notification_sent(db, notification, commit=False)
+                    counts["sent"] += 1
+                    continue
+
+                error = "delivery failed" if future is not None else \
+                    f"unsupported notification type {notification.notification_type}"
+                retry_at = self._next_retry(notification) if future is not None else None
+                DatabaseManager.schedule_notification_retry(
+                    db, notification, error, retry_at, commit=False
+                )
+                counts["retried" if retry_at else "failed"] += 1
+
+            db.commit()
+            return counts
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def run_forever(self):
+        """Poll the outbox until stop() is called"""
+        while not self._stop.is_set():
+            try:
+                counts = self.run_once()
+            except Exception as e:
+                print(f"Notification worker error: {e}")
+                counts = {"claimed": 0}
+            # Keep draining while there is a backlog, otherwise sleep
+            if counts["claimed"] < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Run the worker on a daemon thread inside this process"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self.run_forever, name="notification-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _submit(self, alerter: AlertAuthorities, notification):
+        channel = self.CHANNELS.get(notification.notification_type)
+        if channel == "sms":
+            return self.dispatcher.submit(
+                channel, alerter._deliver_sms, notification.recipient, notification.message,
+                reference=str(notification.id)
+            )
+        if channel == "email":
+            return self.dispatcher.submit(
+                channel, alerter._deliver_email, [notification.recipient],
+                "Cyber Fraud Case Update", notification.message, reference=str(notification.id)
+            )
+        return None
+
+    def _next_retry(self, notification) -> Optional[datetime]:
+        """Exponential backoff with jitter; None once attempts are exhausted"""
+        attempts = notification.attempts or 1
+        if attempts >= self.max_attempts:
+            return None
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+        delay *= random.uniform(0.8, 1.2)
+        return datetime.utcnow() + timedelta(seconds=delay)
+
+
+def worker_from_env() -> NotificationWorker:
+    """Build a worker configured from environment variables"""
+    return NotificationWorker(
+        batch_size=int(os.getenv("NOTIFICATION_BATCH_SIZE", 50)),
+        lease_seconds=int(os.getenv("NOTIFICATION_LEASE_SECONDS", 60)),
+        max_attempts=int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", 5)),
+        backoff_base=float(os.getenv("NOTIFICATION_BACKOFF_SECONDS", 30)),
+        poll_interval=float(os.getenv("NOTIFICATION_POLL_SECONDS", 2)),
+    )
+
+
+if __name__ == "__main__":
+    # Run as a standalone process: python -m Alerts.notification_worker
+    parser = argparse.ArgumentParser(description="Deliver queued notifications")
+    parser.add_argument("--once", action="store_true", help="Deliver one batch and exit")
+    args = parser.parse_args()
+
+    worker = worker_from_env()
+    if args.once:
+        print(worker.run_once())
+    else:
+        print("Notification worker started")
+        try:
+            worker.run_forever()
+        except KeyboardInterrupt:
+            print("Notification worker stopped")
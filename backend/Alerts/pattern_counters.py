@@ -0,0 +1,364 @@
+"""
+Sliding-window counters for fraud pattern detection.
+
+Every complaint is counted under each normalized identifier of the accused
+(account number, UPI handle, and account + bank) in hourly buckets. Buckets
+older than the window are dropped as they age out, so checking how many
+recent complaints share an identifier is a dictionary lookup rather than a
+COUNT over the complaints table.
+
+By default counts are per process (warmed from the database at startup and
+updated whenever a session commits new complaints), which only sees every
+complaint with a single API worker. With several workers, processes or bulk
+ingest jobs set PATTERN_COUNTER_STORE=redis and PATTERN_COUNTER_REDIS_URL so
+they all count into shared hourly bucket keys; if redis is not installed or
+unreachable the local counter stands in. Deployments that run several
+workers without Redis can set PATTERN_CONFIRM_IN_DATABASE=true to have
+AlertAuthorities._detect_pattern re-count a below-threshold complaint in the
+database, at the cost of a query per alert.
+"""
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session
+from collections import deque
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import re
+
+from Database.schema import Complaint
+
+PATTERN_COUNTER_STORE = os.getenv("PATTERN_COUNTER_STORE", "local").lower()
+PATTERN_COUNTER_REDIS_URL = os.getenv("PATTERN_COUNTER_REDIS_URL", "redis://localhost:6379/0")
+PATTERN_CONFIRM_IN_DATABASE = os.getenv("PATTERN_CONFIRM_IN_DATABASE", "false").lower() == "true"
+
+
+def normalize_account(value: Optional[str]) -> Optional[str]:
+    """Account numbers: keep letters/digits only, upper-cased"""
+    if not value:
+        return None
+    cleaned = re.sub(r"[^0-9A-Za-z]", "", value).upper()
+    return cleaned or None
+
+
+def normalize_upi(value: Optional[str]) -> Optional[str]:
+    """UPI handles are case-insensitive: trim and lower-case"""
+    if not value:
+        return None
+    cleaned = re.sub(r"\s+", "", value).lower()
+    return cleaned or None
+
+
+def normalize_bank(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return re.sub(r"\s+", " ", value).strip().upper() or None
+
+
+def identifier_keys(accused_account: Optional[str], accused_upi: Optional[str],
+                    accused_bank: Optional[str]) -> List[str]:
+    """All counter keys for one complaint's accused details"""
+    keys = []
+    account = normalize_account(accused_account)
+    upi = normalize_upi(accused_upi)
+    bank = normalize_bank(accused_bank)
+    if account:
+        keys.append(f"account:{account}")
+        if bank:
+            keys.append(f"account_bank:{account}@{bank}")
+    if upi:
+        keys.append(f"upi:{upi}")
+    return keys
+
+
+class SlidingWindowCounter:
+    """
+    Per-key event counts over a trailing window, kept in fixed-size time buckets.
+    A running total per key makes count() O(1) after dropping expired buckets.
+    """
+
+    shared = False
+
+    def __init__(self, window: timedelta = timedelta(days=7),
+                 bucket: timedelta = timedelta(hours=1), sweep_every: int = 1000):
+        self.window = window
+        self.bucket_seconds = int(bucket.total_seconds())
+        self.window_buckets = int(window.total_seconds() // self.bucket_seconds)
+        self.sweep_every = sweep_every
+        # key -> (deque of [bucket_index, count], running total)
+        self._keys: Dict[str, Tuple[deque, List[int]]] = {}
+        self._adds = 0
+        self._lock = Lock()
+
+    def add(self, key: str, at: datetime, amount: int = 1):
+        index = self._bucket(at)
+        oldest = self._bucket(datetime.utcnow()) - self.window_buckets
+        if index <= oldest:
+            return
+        with self._lock:
+            buckets, total = self._keys.setdefault(key, (deque(), [0]))
+            if buckets and buckets[-1][0] == index:
+                buckets[-1][1] += amount
+            else:
+                # Late arrivals are rare; keep buckets ordered by index
+                position = len(buckets)
+                while position and buckets[position - 1][0] > index:
+                    position -= 1
+                if position and buckets[position - 1][0] == index:
+                    buckets[position - 1][1] += amount
+                else:
+                    buckets.insert(position, [index, amount])
+            total[0] += amount
+            self._adds += 1
+            if self._adds % self.sweep_every == 0:
+                self._sweep(oldest)
+
+    def count(self, key: str, now: Optional[datetime] = None) -> int:
+        oldest = self._bucket(now or datetime.utcnow()) - self.window_buckets
+        with self._lock:
+            entry = self._keys.get(key)
+            if entry is None:
+                return 0
+            return self._expire(key, entry, oldest)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def begin_warm_up(self) -> bool:
+        """Reset before a warm-up; always warm a per-process counter"""
+        self.clear()
+        return True
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _bucket(self, at: datetime) -> int:
+        return int(at.timestamp()) // self.bucket_seconds
+
+    def _expire(self, key, entry, oldest: int) -> int:
+        buckets, total = entry
+        while buckets and buckets[0][0] <= oldest:
+            total[0] -= buckets.popleft()[1]
+        if not buckets:
+            del self._keys[key]
+            return 0
+        return total[0]
+
+    def _sweep(self, oldest: int):
+        """Drop keys whose buckets have all aged out, bounding memory"""
+        for key in list(self._keys):
+            self._expire(key, self._keys[key], oldest)
+
+
+class RedisWindowCounter:
+    """
+    SlidingWindowCounter's interface over Redis: one INCR'd key per
+    identifier and hour, expiring once it leaves the window, so every worker
+    counts into and reads the same buckets. Falls back to a local counter
+    while Redis is unreachable.
+    """
+
+    WARMED_KEY = "pattern:warmed"
+
+    def __init__(self, client, window: timedelta = timedelta(days=7),
+                 bucket: timedelta = timedelta(hours=1),
+                 fallback: Optional[SlidingWindowCounter] = None):
+        self.client = client
+        self.bucket_seconds = int(bucket.total_seconds())
+        self.window_buckets = int(window.total_seconds() // self.bucket_seconds)
+        self.fallback = fallback or SlidingWindowCounter(window=window, bucket=bucket)
+        self.shared = True
+
+    def add(self, key: str, at: datetime, amount: int = 1):
+        index = self._bucket(at)
+        if index <= self._bucket(datetime.utcnow()) - self.window_buckets:
+            return
+        name = f"pattern:{key}:{index}"
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.incrby(name, amount)
+            pipe.expireat(name, (index + self.window_buckets + 1) * self.bucket_seconds)
+            pipe.execute()
+        except Exception as e:
+            self._unavailable(e)
+            self.fallback.add(key, at, amount)
+            return
+        self.shared = True
+
+    def count(self, key: str, now: Optional[datetime] = None) -> int:
+        newest = self._bucket(now or datetime.utcnow())
+        names = [f"pattern:{key}:{index}" for index in range(newest - self.window_buckets + 1, newest + 1)]
+        try:
+            values = self.client.mget(names)
+        except Exception as e:
+            self._unavailable(e)
+            return self.fallback.count(key, now)
+        self.shared = True
+        return sum(int(value) for value in values if value)
+
+    def begin_warm_up(self) -> bool:
+        """Only the first worker to start against an empty Redis seeds the counts"""
+        try:
+            return bool(self.client.set(self.WARMED_KEY, 1, nx=True))
+        except Exception as e:
+            self._unavailable(e)
+            return self.fallback.begin_warm_up()
+
+    def clear(self):
+        self.fallback.clear()
+
+    def _bucket(self, at: datetime) -> int:
+        return int(at.timestamp()) // self.bucket_seconds
+
+    def _unavailable(self, error: Exception):
+        if self.shared:
+            print(f"Pattern counter store unavailable, using local counts: {error}")
+        self.shared = False
+
+
+def counter_from_env(window: timedelta = timedelta(days=7)):
+    if PATTERN_COUNTER_STORE == "redis":
+        try:
+            import redis
+        except ImportError:
+            print("PATTERN_COUNTER_STORE=redis but the redis package is not installed; using local counts")
+            return SlidingWindowCounter(window=window)
+        client = redis.Redis.from_url(PATTERN_COUNTER_REDIS_URL, socket_timeout=0.5)
+        return RedisWindowCounter(client, window=window)
+    return SlidingWindowCounter(window=window)
+
+
+class PatternCounterStore:
+    """Counts recent complaints per accused identifier"""
+
+    def __init__(self, window: timedelta = timedelta(days=7), counter=None,
+                 confirm_in_database: bool = False):
+        self.window = window
+        self.counter = counter or SlidingWindowCounter(window=window)
+        self.confirm_in_database = confirm_in_database
+
+    @property
+    def shared(self) -> bool:
+        """True when counts include complaints committed by every worker"""
+        return self.counter.shared
+
+    @property
+    def needs_confirmation(self) -> bool:
+        """True when a low count should be re-checked with database_similar_cases"""
+        return self.confirm_in_database and not self.shared
+
+    def record(self, keys: Iterable[str], created_at: Optional[datetime]):
+        at = created_at or datetime.utcnow()
+        for key in keys:
+            self.counter.add(key, at)
+
+    def record_complaint(self, complaint: Complaint):
+        self.record(
+            identifier_keys(complaint.accused_account, complaint.accused_upi, complaint.accused_bank),
+            complaint.created_at
+        )
+
+    def similar_cases(self, complaint: Complaint) -> Dict[str, int]:
+        """
+        Number of other complaints in the window sharing each identifier of
+        this complaint. The complaint itself is excluded when it falls inside
+        the window (and was therefore counted).
+        """
+        now = datetime.utcnow()
+        self_counted = complaint.created_at is not None and complaint.created_at >= now - self.window
+        keys = identifier_keys(complaint.accused_account, complaint.accused_upi, complaint.accused_bank)
+        return {
+            key: max(0, self.counter.count(key, now) - (1 if self_counted else 0))
+            for key in keys
+        }
+
+    def database_similar_cases(self, db: Session, complaint: Complaint) -> Dict[str, int]:
+        """
+        similar_cases() counted in the database instead of the counters.
+        Candidates sharing the raw account number or UPI handle are read
+        (ix_complaints_accused_account_created covers the account) and keyed
+        with identifier_keys, so both checks agree on what counts as a match.
+        """
+        keys = identifier_keys(complaint.accused_account, complaint.accused_upi, complaint.accused_bank)
+        if not keys:
+            return {}
+        matches = []
+        if complaint.accused_account:
+            matches.append(Complaint.accused_account == complaint.accused_account)
+        upi = normalize_upi(complaint.accused_upi)
+        if upi:
+            matches.append(func.lower(Complaint.accused_upi) == upi)
+        rows = db.execute(
+            select(Complaint.accused_account, Complaint.accused_upi, Complaint.accused_bank)
+            .where(
+                or_(*matches),
+                Complaint.created_at >= datetime.utcnow() - self.window,
+                Complaint.id != complaint.id
+            )
+        )
+        counts = dict.fromkeys(keys, 0)
+        for account, other_upi, bank in rows:
+            for key in identifier_keys(account, other_upi, bank):
+                if key in counts:
+                    counts[key] += 1
+        return counts
+
+    def warm_up(self, db: Session):
+        """Rebuild the counts from complaints created within the window"""
+        if not self.counter.begin_warm_up():
+            print("Pattern counters already warm in the shared store")
+            return
+        since = datetime.utcnow() - self.window
+        rows = db.execute(
+            select(Complaint.accused_account, Complaint.accused_upi,
+                   Complaint.accused_bank, Complaint.created_at)
+            .where(Complaint.created_at >= since)
+        )
+        loaded = 0
+        for account, upi, bank, created_at in rows:
+            self.record(identifier_keys(account, upi, bank), created_at)
+            loaded += 1
+        print(f"Pattern counters warmed from {loaded} recent complaints")
+
+
+# Shared store used by AlertAuthorities._detect_pattern
+pattern_counters = PatternCounterStore(counter=counter_from_env(),
+                                       confirm_in_database=PATTERN_CONFIRM_IN_DATABASE)
+
+
+def track_new_complaints(session: Session, complaints: Iterable[Complaint]):
+    """
+    Count complaints once session commits. ORM inserts are tracked
+    automatically; bulk Core inserts (Database.ingest) pass them here.
+    """
+    pending = session.info.setdefault("new_complaint_identifiers", [])
+    for complaint in complaints:
+        pending.append((
+            identifier_keys(complaint.accused_account, complaint.accused_upi, complaint.accused_bank),
+            complaint.created_at
+        ))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_new_complaints(session, flush_context):
+    """Capture identifiers of inserted complaints while their values are loaded"""
+    new_complaints = [obj for obj in session.new if isinstance(obj, Complaint)]
+    if new_complaints:
+        track_new_complaints(session, new_complaints)
+
+
+@event.listens_for(Session, "after_commit")
+def _count_committed_complaints(session):
+    # Also fired when a savepoint is released; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    for keys, created_at in session.info.pop("new_complaint_identifiers", ()):
+        pattern_counters.record(keys, created_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_complaints(session):
+    if session.in_nested_transaction():
+        return  # only a savepoint; the transaction is still open
+    session.info.pop("new_complaint_identifiers", None)
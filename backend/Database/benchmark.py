@@ -0,0 +1,141 @@
+"""
+Write-concurrency benchmark for the database connection profiles.
+
+Concurrent writer threads create complaints (complaint + rollup delta, one
+transaction each, like POST /api/complaints) while reader threads run the
+list query. Each profile gets a fresh database, and the report shows
+throughput, write latency and how many writes failed with "database is
+locked":
+
+    python -m Database.benchmark                          # SQLite: default vs production
+    python -m Database.benchmark --writers 16 --seconds 20
+    python -m Database.benchmark --url postgresql://...   # any DATABASE_URL
+"""
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from datetime import datetime
+from threading import Event, Lock, Thread
+from uuid import uuid4
+import argparse
+import os
+import tempfile
+import time
+
+from .database import DatabaseManager, create_db_engine, is_sqlite
+from .schema import Base, Complaint, User, FraudType, CaseStatus
+
+DISTRICTS = ("Khordha", "Cuttack", "Puri", "Ganjam", "Sambalpur")
+
+
+def run_profile(url: str, profile: str, writers: int, readers: int, seconds: float) -> dict:
+    engine = create_db_engine(url, sqlite_profile=profile)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as db:
+        victim = User(phone_number="9000000000", full_name="Benchmark Victim", role="victim")
+        db.add(victim)
+        db.commit()
+        victim_id = victim.id
+
+    stop = Event()
+    lock = Lock()
+    stats = {"writes": 0, "reads": 0, "locked": 0, "errors": 0, "latencies": []}
+
+    def writer(n):
+        with Session() as db:
+            i = 0
+            while not stop.is_set():
+                i += 1
+                started = time.perf_counter()
+                try:
+                    DatabaseManager.create_complaint(db, {
+                        "complaint_id": f"BM{uuid4().hex[:14].upper()}",
+                        "victim_id": victim_id,
+                        "fraud_type": FraudType.UPI_SCAM,
+                        "status": CaseStatus.PENDING,
+                        "amount_lost": 1000.0 + i,
+                        "accused_account": f"ACC{n}{i % 50}",
+                        "district": DISTRICTS[i % len(DISTRICTS)],
+                        "transaction_date": datetime.utcnow(),
+                    })
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        stats["writes"] += 1
+                        stats["latencies"].append(elapsed)
+                except OperationalError as e:
+                    db.rollback()
+                    with lock:
+                        stats["locked" if "locked" in str(e) else "errors"] += 1
+
+    def reader(n):
+        with Session() as db:
+            i = 0
+            while not stop.is_set():
+                i += 1
+                try:
+                    db.execute(
+                        select(Complaint.id, Complaint.complaint_id)
+                        .where(Complaint.district == DISTRICTS[i % len(DISTRICTS)])
+                        .order_by(Complaint.created_at.desc(), Complaint.id.desc())
+                        .limit(50)
+                    ).all()
+                    db.rollback()  # end the read transaction, like a request would
+                    with lock:
+                        stats["reads"] += 1
+                except OperationalError as e:
+                    db.rollback()
+                    with lock:
+                        stats["locked" if "locked" in str(e) else "errors"] += 1
+
+    threads = [Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [Thread(target=reader, args=(n,)) for n in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies = sorted(stats["latencies"]) or [0.0]
+    return {
+        "profile": profile,
+        "writes_per_sec": stats["writes"] / seconds,
+        "reads_per_sec": stats["reads"] / seconds,
+        "p50_write_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_write_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "locked": stats["locked"],
+        "errors": stats["errors"],
+    }
+
+
+def print_report(results):
+    print(f"{'profile':<12}{'writes/s':>10}{'reads/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'locked':>8}{'errors':>8}")
+    for r in results:
+        print(f"{r['profile']:<12}{r['writes_per_sec']:>10.0f}{r['reads_per_sec']:>10.0f}"
+              f"{r['p50_write_ms']:>9.1f}{r['p95_write_ms']:>9.1f}{r['locked']:>8}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent complaint writes")
+    parser.add_argument("--url", help="Database to benchmark (tables are dropped!); default: temporary SQLite files")
+    parser.add_argument("--profiles", nargs="+", default=["default", "production"],
+                        help="SQLite profiles to compare")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profiles:
+            url = args.url or f"sqlite:///{os.path.join(tmp, f'bench_{profile}.db')}"
+            print(f"Running {profile} profile on {url.split('@')[-1]} "
+                  f"({args.writers} writers, {args.readers} readers, {args.seconds:.0f}s)...")
+            results.append(run_profile(url, profile, args.writers, args.readers, args.seconds))
+            if args.url and not is_sqlite(args.url):
+                break  # the profile only affects SQLite
+    print_report(results)
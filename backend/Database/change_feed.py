@@ -0,0 +1,376 @@
+"""
+In-process change feed for server-push clients (GET /api/events/stream).
+
+Committed complaint, bank action and case activity changes are published to
+topics:
+
+    complaint:<complaint_id>   everything about one complaint
+    district:<district>        complaint and bank action changes in a district
+    freeze_queue               bank actions (freeze requests and their outcomes)
+
+Changes are collected on the session at flush and published once it
+commits, so subscribers never see rolled-back writes. Each subscriber has a
+bounded buffer; a subscriber that falls behind has its buffer replaced by a
+single "resync" event, telling the client to refetch instead of holding
+unbounded memory for it.
+
+By default (EVENTS_BROKER=local) changes only reach clients connected to the
+process that committed them, which covers a single API worker with the
+notification worker and alert sweeper running in-process. With several API
+workers, or standalone worker/sweeper/ingest processes, set
+EVENTS_BROKER=redis and EVENTS_REDIS_URL: every process publishes committed
+changes to one Redis pub/sub channel and every API worker delivers them to
+its own subscribers. If redis is not installed or unreachable, changes are
+delivered locally; subscribers get a resync event when the channel comes
+back, since they may have missed changes meanwhile.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from datetime import datetime
+from threading import Event, Thread
+from typing import Callable, Dict, Iterable, List, Optional, Set
+import asyncio
+import enum
+import itertools
+import json
+import os
+
+from .schema import BankAction, CaseActivity, Complaint
+
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", 100))
+EVENTS_MAX_CONNECTIONS = int(os.getenv("EVENTS_MAX_CONNECTIONS", 10000))
+EVENTS_BROKER = os.getenv("EVENTS_BROKER", "local").lower()
+EVENTS_REDIS_URL = os.getenv("EVENTS_REDIS_URL", "redis://localhost:6379/0")
+EVENTS_REDIS_CHANNEL = os.getenv("EVENTS_REDIS_CHANNEL", "scamshield:events")
+
+FREEZE_QUEUE = "freeze_queue"
+
+
+class Subscriber:
+    """One connection: its topics and a bounded event buffer"""
+
+    def __init__(self, topics: Set[str], buffer_size: int):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def offer(self, event: Dict):
+        """Buffer an event; on overflow replace the backlog with one resync event"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync", "id": event["id"], "dropped": self.dropped})
+
+
+class LocalBroker:
+    """Committed changes reach subscribers of this process only"""
+
+    name = "local"
+    shared = False
+
+    def publish(self, events: List[Dict], deliver: Callable[[List[Dict]], None]):
+        deliver(events)
+
+    def start(self, deliver: Callable[[List[Dict]], None], resync: Callable[[], None]):
+        pass
+
+    def stop(self):
+        pass
+
+
+class RedisBroker:
+    """
+    Fan-out through a Redis pub/sub channel. Every process publishes its
+    committed changes; API workers listen on a thread and hand what they
+    receive to their own subscribers. Publishing falls back to local delivery
+    while Redis is unreachable.
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, client, listen_client, channel: str = EVENTS_REDIS_CHANNEL,
+                 retry_seconds: float = 5.0):
+        self.client = client
+        self.listen_client = listen_client
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self._warned = False
+
+    def publish(self, events: List[Dict], deliver: Callable[[List[Dict]], None]):
+        try:
+            self.client.publish(self.channel, json.dumps(events, default=str))
+        except Exception as e:
+            if not self._warned:
+                print(f"Event broker unavailable, delivering changes locally: {e}")
+                self._warned = True
+            deliver(events)
+            return
+        self._warned = False
+
+    def start(self, deliver: Callable[[List[Dict]], None], resync: Callable[[], None]):
+        """Listen on a daemon thread, reconnecting (and resyncing subscribers) after errors"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._listen, args=(deliver, resync), name="events-broker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _listen(self, deliver, resync):
+        reconnecting = False
+        while not self._stop.is_set():
+            pubsub = self.listen_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                if reconnecting:
+                    # Changes published while disconnected were missed
+                    resync()
+                    reconnecting = False
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "message":
+                        deliver(json.loads(message["data"]))
+            except Exception as e:
+                if not reconnecting:
+                    print(f"Event broker connection lost, retrying: {e}")
+                reconnecting = True
+                self._stop.wait(self.retry_seconds)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+def broker_from_env():
+    if EVENTS_BROKER == "redis":
+        try:
+            import redis
+        except ImportError:
+            print("EVENTS_BROKER=redis but the redis package is not installed; delivering changes locally")
+            return LocalBroker()
+        return RedisBroker(
+            redis.Redis.from_url(EVENTS_REDIS_URL, socket_timeout=0.5),
+            redis.Redis.from_url(EVENTS_REDIS_URL),
+        )
+    return LocalBroker()
+
+
+class ChangeFeed:
+    """Topic -> subscribers registry living on the API's event loop"""
+
+    def __init__(self, buffer_size: int = EVENTS_BUFFER_SIZE, max_connections: int = EVENTS_MAX_CONNECTIONS,
+                 broker=None):
+        self.buffer_size = buffer_size
+        self.max_connections = max_connections
+        self.broker = broker or LocalBroker()
+        self._topics: Dict[str, Set[Subscriber]] = {}
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+        self.stats = dict.fromkeys(("published", "delivered", "resyncs"), 0)
+
+    @property
+    def wants_changes(self) -> bool:
+        """Whether committed changes need to be collected in this process"""
+        return self.broker.shared or bool(self._subscribers)
+
+    def start(self):
+        """Start receiving changes published by other processes (API workers only)"""
+        self.broker.start(self.dispatch, self.resync_all)
+
+    def stop(self):
+        self.broker.stop()
+
+    def subscribe(self, topics: Iterable[str]) -> Optional[Subscriber]:
+        """Register a subscriber (call on the event loop); None when at max_connections"""
+        if len(self._subscribers) >= self.max_connections:
+            return None
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(set(topics), self.buffer_size)
+        self._subscribers.add(subscriber)
+        for topic in subscriber.topics:
+            self._topics.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+        for topic in subscriber.topics:
+            members = self._topics.get(topic)
+            if members is not None:
+                members.discard(subscriber)
+                if not members:
+                    del self._topics[topic]
+
+    def publish(self, events: Optional[List[Dict]]):
+        """Publish committed changes from any thread, through the broker"""
+        if events:
+            self.broker.publish(events, self.dispatch)
+
+    def dispatch(self, events: List[Dict]):
+        """Hand events to this process' subscribers from any thread; a no-op while nobody is subscribed"""
+        loop = self._loop
+        if not events or loop is None or not self._subscribers or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._deliver, events)
+        except RuntimeError:
+            pass  # loop shutting down
+
+    def resync_all(self):
+        """Tell every subscriber to refetch (changes may have been missed)"""
+        self.dispatch([{"type": "resync", "topics": list(self._topics)}])
+
+    def _deliver(self, events: List[Dict]):
+        for item in events:
+            item = {**item, "id": next(self._ids)}
+            self.stats["published"] += 1
+            topics = item.pop("topics")
+            targets = set()
+            for topic in topics:
+                targets |= self._topics.get(topic, set())
+            for subscriber in targets:
+                dropped = subscriber.dropped
+                subscriber.offer(item)
+                self.stats["delivered"] += 1
+                if subscriber.dropped != dropped:
+                    self.stats["resyncs"] += 1
+
+    def snapshot_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "broker": self.broker.name,
+            "connections": len(self._subscribers),
+            "max_connections": self.max_connections,
+            "topics": len(self._topics),
+            "buffer_size": self.buffer_size,
+        }
+
+
+# Shared feed used by routes/events.py
+change_feed = ChangeFeed(broker=broker_from_env())
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _complaint_event(complaint: Complaint, action: str) -> Dict:
+    return {
+        "type": f"complaint.{action}",
+        "complaint_id": complaint.complaint_id,
+        "status": _plain(complaint.status),
+        "district": complaint.district,
+        "is_priority": complaint.is_priority,
+        "is_funds_frozen": complaint.is_funds_frozen,
+        "amount_recovered": complaint.amount_recovered,
+        "topics": [f"complaint:{complaint.complaint_id}", f"district:{complaint.district}"],
+    }
+
+
+def _masked_account(account_number: Optional[str]) -> Optional[str]:
+    """The stream is unauthenticated: mask accounts as /api/alerts/bank-freeze does"""
+    return account_number[-4:] + "****" if account_number else None
+
+
+def _bank_action_event(action: BankAction, complaint: Complaint, verb: str) -> Dict:
+    return {
+        "type": f"bank_action.{verb}",
+        "complaint_id": complaint.complaint_id,
+        "bank_action_id": action.id,
+        "bank_name": action.bank_name,
+        "account": _masked_account(action.account_number),
+        "action_type": action.action_type,
+        "status": action.status,
+        "amount": action.amount,
+        "topics": [f"complaint:{complaint.complaint_id}", f"district:{complaint.district}", FREEZE_QUEUE],
+    }
+
+
+def _activity_event(activity: CaseActivity, complaint: Complaint) -> Dict:
+    return {
+        "type": "activity.created",
+        "complaint_id": complaint.complaint_id,
+        "action_type": _plain(activity.action_type),
+        "description": activity.description,
+        "created_at": _plain(activity.created_at),
+        "topics": [f"complaint:{complaint.complaint_id}"],
+    }
+
+
+def track_new_complaints(session: Session, complaints: Iterable[Complaint]):
+    """
+    Publish complaint.created for complaints once session commits. ORM inserts
+    are tracked automatically; bulk Core inserts (Database.ingest) pass them here.
+    """
+    if change_feed.wants_changes:
+        session.info.setdefault("change_events", []).extend(
+            _complaint_event(complaint, "created") for complaint in complaints
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    """Turn this flush's complaint, bank action and activity changes into events"""
+    if not change_feed.wants_changes:
+        return
+    events = []
+    for obj, verb in [(o, "created") for o in session.new] + [(o, "updated") for o in session.dirty]:
+        if verb == "updated" and not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, Complaint):
+            events.append(_complaint_event(obj, verb))
+        elif isinstance(obj, (BankAction, CaseActivity)):
+            # Usually already in the identity map, so no query is issued
+            complaint = session.get(Complaint, obj.complaint_id)
+            if complaint is None:
+                continue
+            if isinstance(obj, BankAction):
+                events.append(_bank_action_event(obj, complaint, verb))
+            elif verb == "created":
+                events.append(_activity_event(obj, complaint))
+    if events:
+        session.info.setdefault("change_events", []).extend(events)
+
+
+@event.listens_for(Session, "after_transaction_create")
+def _mark_savepoint(session, transaction):
+    """Remember how many events preceded a savepoint, so rolling it back drops only its own"""
+    if transaction.nested and change_feed.wants_changes:
+        marks = session.info.setdefault("change_event_marks", {})
+        marks[transaction] = len(session.info.get("change_events", ()))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_changes(session):
+    # Also fired when a savepoint is released; publish on the real commit only
+    if session.in_nested_transaction():
+        return
+    session.info.pop("change_event_marks", None)
+    change_feed.publish(session.info.pop("change_events", None))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session):
+    savepoint = session.get_nested_transaction()
+    if savepoint is None:
+        session.info.pop("change_event_marks", None)
+        session.info.pop("change_events", None)
+        return
+    mark = session.info.get("change_event_marks", {}).pop(savepoint, None)
+    if mark is not None:
+        del session.info.get("change_events", [])[mark:]
@@ -0,0 +1,117 @@
+"""
+EXPLAIN check for the hot query shapes used by the routes and alerts.
+
+Run against the configured DATABASE_URL:
+
+    python -m Database.explain_check
+
+Every query is explained with the database's own planner and must be
+answered through an index. Exits non-zero if any of them falls back to a
+full table scan, so it can run in CI after schema changes.
+"""
+from sqlalchemy import or_, select, func, tuple_
+from datetime import datetime, timedelta
+import sys
+
+from .database import engine, migrate_db, DatabaseManager
+from .schema import Complaint, CaseActivity, CaseStatus, OTP
+
+
+def hot_queries():
+    """(name, statement) pairs mirroring the queries issued by the API"""
+    now = datetime.utcnow()
+    month_ago = now - timedelta(days=30)
+    week_ago = now - timedelta(days=7)
+    cursor = (now, 1_000_000)
+    newest_first = (Complaint.created_at.desc(), Complaint.id.desc())
+
+    return [
+        ("list_complaints status+district", select(Complaint).where(
+            Complaint.status == CaseStatus.PENDING,
+            Complaint.district == "Khordha",
+            tuple_(Complaint.created_at, Complaint.id) < cursor
+        ).order_by(*newest_first).limit(51)),
+        ("list_complaints district", select(Complaint).where(
+            Complaint.district == "Khordha"
+        ).order_by(*newest_first).limit(51)),
+        ("analytics window+district", select(
+            func.count(Complaint.id), func.sum(Complaint.amount_lost)
+        ).where(
+            Complaint.district == "Khordha",
+            Complaint.created_at >= month_ago,
+            Complaint.created_at <= now
+        )),
+        ("analytics window", select(
+            Complaint.fraud_type, func.count(Complaint.id)
+        ).where(
+            Complaint.created_at >= month_ago,
+            Complaint.created_at <= now
+        ).group_by(Complaint.fraud_type)),
+        ("cases_by_status", DatabaseManager.cases_by_status_statement("PENDING", 50)),
+        ("analytics_summary", DatabaseManager.analytics_summary_statement(month_ago, now)),
+        ("pattern_counters warm-up", select(
+            Complaint.accused_account, Complaint.accused_upi,
+            Complaint.accused_bank, Complaint.created_at
+        ).where(Complaint.created_at >= week_ago)),
+        ("complaint_activity", select(CaseActivity).where(
+            CaseActivity.complaint_id == 1
+        ).order_by(CaseActivity.created_at.desc())),
+        ("verify_otp", select(OTP).where(
+            OTP.phone_number == "9876543210",
+            OTP.complaint_id == "CF20240101000000",
+            OTP.expires_at > now,
+            OTP.otp_code == "123456",
+            OTP.is_verified == False
+        )),
+        ("otp purge", select(OTP.id).where(OTP.expires_at < now).limit(1000)),
+        ("alert sweeper", select(Complaint.id).where(
+            Complaint.status == CaseStatus.PENDING,
+            Complaint.transaction_date >= now - timedelta(hours=1),
+            Complaint.alerts_triggered_at.is_(None),
+            or_(Complaint.alerts_claimed_at.is_(None), Complaint.alerts_claimed_at < now - timedelta(minutes=10))
+        ).order_by(Complaint.transaction_date).limit(100)),
+        ("priority_cases", select(Complaint).where(
+            Complaint.is_priority == True
+        ).order_by(*newest_first).limit(51)),
+    ]
+
+
+def explain(conn, statement) -> str:
+    """Return the planner output for a statement as one string"""
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN" if engine.dialect.name == "sqlite" else "EXPLAIN"
+    rows = conn.exec_driver_sql(f"{prefix} {compiled}").fetchall()
+    return "\n".join(" ".join(str(col) for col in row) for row in rows)
+
+
+def uses_index(plan: str) -> bool:
+    """True if the plan reads through an index and never scans a whole table"""
+    if engine.dialect.name == "sqlite":
+        full_scans = [
+            line for line in plan.splitlines()
+            if "SCAN " in line and "USING" not in line and "SUBQUERY" not in line
+        ]
+        return "USING" in plan and "INDEX" in plan and not full_scans
+    return "Index" in plan and "Seq Scan" not in plan
+
+
+def run_checks() -> bool:
+    migrate_db()
+    ok = True
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            # Small or empty tables make Postgres prefer sequential scans;
+            # the check is whether a usable index exists for each shape.
+            conn.exec_driver_sql("SET enable_seqscan = off")
+        for name, statement in hot_queries():
+            plan = explain(conn, statement)
+            passed = uses_index(plan)
+            ok = ok and passed
+            print(f"{'✓' if passed else '✗'} {name}")
+            if not passed:
+                print("    " + plan.replace("\n", "\n    "))
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_checks() else 1)
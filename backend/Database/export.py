@@ -0,0 +1,119 @@
+"""
+Streaming CSV/NDJSON exports.
+
+Rows are read from a server-side cursor in batches (yield_per) on a session
+owned by the stream itself and encoded batch by batch, so memory use stays
+flat however many rows an export covers.
+"""
+from sqlalchemy import select
+from datetime import date, datetime
+from typing import AsyncIterator, Optional, Sequence
+import csv
+import enum
+import io
+import json
+
+from .async_database import AsyncReadSessionLocal
+from .schema import Analytics, Complaint, CaseStatus
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+COMPLAINT_EXPORT_COLUMNS = (
+    Complaint.complaint_id,
+    Complaint.fraud_type,
+    Complaint.status,
+    Complaint.amount_lost,
+    Complaint.amount_recovered,
+    Complaint.district,
+    Complaint.city,
+    Complaint.transaction_id,
+    Complaint.transaction_date,
+    Complaint.accused_bank,
+    Complaint.fir_number,
+    Complaint.police_station,
+    Complaint.is_golden_hour,
+    Complaint.is_funds_frozen,
+    Complaint.is_priority,
+    Complaint.created_at,
+    Complaint.closed_at,
+)
+
+ANALYTICS_EXPORT_COLUMNS = (
+    Analytics.date,
+    Analytics.district,
+    Analytics.fraud_type,
+    Analytics.total_cases,
+    Analytics.cases_resolved,
+    Analytics.cases_pending,
+    Analytics.total_amount_lost,
+    Analytics.total_amount_recovered,
+)
+
+
+def complaint_filter_statement(status: Optional[str] = None, district: Optional[str] = None, columns=None):
+    """Complaints matching the list_complaints filters (unordered)"""
+    query = select(*columns) if columns else select(Complaint)
+    if status:
+        query = query.where(Complaint.status == CaseStatus[status])
+    if district:
+        query = query.where(Complaint.district == district)
+    return query
+
+
+def complaint_export_statement(status: Optional[str] = None, district: Optional[str] = None):
+    """Export columns for the list_complaints filters, newest first"""
+    return complaint_filter_statement(status, district, COMPLAINT_EXPORT_COLUMNS).order_by(
+        Complaint.created_at.desc(), Complaint.id.desc()
+    )
+
+
+def analytics_export_statement(start: datetime, end: datetime, district: Optional[str] = None):
+    """Daily rollup rows for a day window, oldest first"""
+    query = select(*ANALYTICS_EXPORT_COLUMNS).where(
+        Analytics.date >= datetime(start.year, start.month, start.day),
+        Analytics.date <= datetime(end.year, end.month, end.day),
+    )
+    if district:
+        query = query.where(Analytics.district == district)
+    return query.order_by(Analytics.date, Analytics.district, Analytics.fraud_type)
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode(fmt: str, header: Sequence[str], rows) -> str:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([_plain(v) for v in row] for row in rows)
+        return buffer.getvalue()
+    return "".join(
+        json.dumps(dict(zip(header, (_plain(v) for v in row)))) + "\n" for row in rows
+    )
+
+
+async def stream_export(statement, fmt: str = "csv", session_factory=None) -> AsyncIterator[str]:
+    """
+    Yield the statement's rows as CSV (with a header row) or NDJSON text chunks.
+    Reads go to the read engine unless another session_factory is given.
+    """
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported format: {fmt}")
+    header = [column.key for column in statement.selected_columns]
+    if fmt == "csv":
+        yield _encode(fmt, header, [header])
+    # The response outlives the request's dependencies, so the stream opens
+    # its own session
+    async with (session_factory or AsyncReadSessionLocal)() as db:
+        result = await db.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield _encode(fmt, header, rows)
@@ -0,0 +1,284 @@
+"""
+Bulk complaint ingestion for 1930/CFCFRMS feeds.
+
+Records are parsed incrementally from NDJSON (one JSON object per line) or
+CSV (header row first) and written in chunks: one transaction per chunk,
+with victims upserted and complaints inserted as multi-row statements and
+the analytics rollups updated once per chunk. Bad rows are reported with
+their line number and skipped; they never abort the batch.
+
+    python -m Database.ingest complaints.ndjson
+    python -m Database.ingest complaints.csv --format csv --chunk-size 2000
+    cat feed.ndjson | python -m Database.ingest -
+"""
+from sqlalchemy import select, insert
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+from uuid import uuid4
+import argparse
+import csv
+import json
+import sys
+
+from .schema import Complaint, User, FraudType, CaseStatus
+from .rollups import apply_new_complaints
+
+REQUIRED_FIELDS = ("victim_phone", "victim_name", "fraud_type", "amount_lost", "district", "description")
+OPTIONAL_FIELDS = (
+    "complaint_id", "accused_account", "accused_upi", "accused_bank",
+    "transaction_id", "transaction_date", "victim_account", "cfcfrms_id", "city",
+)
+MAX_REPORTED_ERRORS = 1000
+
+
+def parse_ndjson(stream: TextIO) -> Iterator[Tuple[int, object]]:
+    """Yield (line_number, record) per non-empty line; parse errors are yielded as the exception"""
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e}")
+
+
+def parse_csv(stream: TextIO) -> Iterator[Tuple[int, object]]:
+    """Yield (line_number, record) per CSV row after the header"""
+    reader = csv.DictReader(stream)
+    for record in reader:
+        # Empty cells mean "not provided"
+        yield reader.line_num, {k: v for k, v in record.items() if k and v not in (None, "")}
+
+
+PARSERS = {"ndjson": parse_ndjson, "csv": parse_csv}
+
+
+def normalize_record(raw) -> Dict:
+    """Validate one feed record and map it to complaint columns. Raises ValueError."""
+    if not isinstance(raw, dict):
+        raise ValueError("Record must be an object")
+    missing = [field for field in REQUIRED_FIELDS if raw.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+    try:
+        fraud_type = FraudType[str(raw["fraud_type"]).strip().upper()]
+    except KeyError:
+        raise ValueError(f"Unknown fraud_type: {raw['fraud_type']}")
+    try:
+        amount_lost = float(raw["amount_lost"])
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid amount_lost: {raw['amount_lost']}")
+    if amount_lost < 0:
+        raise ValueError("amount_lost must not be negative")
+
+    record = {field: str(raw[field]).strip() for field in OPTIONAL_FIELDS if raw.get(field) not in (None, "")}
+    if "transaction_date" in record:
+        try:
+            transaction_date = datetime.fromisoformat(record["transaction_date"].replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"Invalid transaction_date: {record['transaction_date']}")
+        # Columns hold naive UTC (datetime.utcnow()); the database would drop an offset unconverted
+        if transaction_date.tzinfo is not None:
+            transaction_date = transaction_date.astimezone(timezone.utc).replace(tzinfo=None)
+        record["transaction_date"] = transaction_date
+
+    record.update(
+        victim_phone=str(raw["victim_phone"]).strip(),
+        victim_name=str(raw["victim_name"]).strip(),
+        fraud_type=fraud_type,
+        amount_lost=amount_lost,
+        district=str(raw["district"]).strip(),
+        description=str(raw["description"]),
+    )
+    return record
+
+
+def _insert_ignoring_conflicts(db: Session, model):
+    """INSERT that skips rows hitting a unique constraint, where the dialect supports it"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing()
+
+
+def _upsert_victims(db: Session, victims: Dict[str, str], now: datetime) -> Dict[str, int]:
+    """Map phone_number -> user id, creating the users that do not exist yet"""
+    phones = list(victims)
+    user_ids = dict(db.execute(
+        select(User.phone_number, User.id).where(User.phone_number.in_(phones))
+    ).all())
+    missing = [phone for phone in phones if phone not in user_ids]
+    if missing:
+        db.execute(_insert_ignoring_conflicts(db, User), [
+            {"phone_number": phone, "full_name": victims[phone], "role": "victim",
+             "created_at": now, "updated_at": now}
+            for phone in missing
+        ])
+        user_ids.update(db.execute(
+            select(User.phone_number, User.id).where(User.phone_number.in_(missing))
+        ).all())
+    return user_ids
+
+
+def ingest_chunk(db: Session, rows: List[Tuple[int, Dict]]) -> Tuple[int, List[Dict]]:
+    """
+    Write one chunk of normalized records in the session's transaction.
+    Returns (inserted, errors); the caller commits.
+    """
+    from Alerts.pattern_counters import track_new_complaints as count_patterns
+    from Alerts.mule_network import track_new_complaints as link_clusters
+    from .change_feed import track_new_complaints as publish_changes
+
+    now = datetime.utcnow()
+    errors = []
+
+    # Complaint ids must be unique within the chunk and against the table
+    provided = [record["complaint_id"] for _, record in rows if "complaint_id" in record]
+    taken = set(db.scalars(
+        select(Complaint.complaint_id).where(Complaint.complaint_id.in_(provided))
+    ).all()) if provided else set()
+    accepted = []
+    for line_no, record in rows:
+        complaint_id = record.get("complaint_id")
+        if complaint_id in taken:
+            errors.append({"line": line_no, "error": f"Duplicate complaint_id: {complaint_id}"})
+            continue
+        if complaint_id:
+            taken.add(complaint_id)
+        accepted.append((line_no, record))
+    if not accepted:
+        return 0, errors
+
+    user_ids = _upsert_victims(
+        db, {record["victim_phone"]: record["victim_name"] for _, record in accepted}, now
+    )
+
+    complaints = []
+    for line_no, record in accepted:
+        values = {k: v for k, v in record.items() if k not in ("victim_phone", "victim_name")}
+        values.setdefault("complaint_id", f"CF{now.year}{str(uuid4()).replace('-', '')[:10].upper()}")
+        # Undated feed rows keep a NULL transaction_date: stamping them with
+        # now would put old cases inside the golden hour for the alert sweeper
+        complaints.append(Complaint(
+            victim_id=user_ids[record["victim_phone"]],
+            status=CaseStatus.PENDING,
+            amount_recovered=0.0,
+            is_golden_hour=False,
+            is_funds_frozen=False,
+            is_priority=False,
+            reported_at=now,
+            created_at=now,
+            updated_at=now,
+            **values
+        ))
+
+    # Transient objects carry the values; the rows go in as one executemany
+    columns = [column.key for column in Complaint.__table__.columns if column.key != "id"]
+    db.execute(insert(Complaint), [
+        {key: getattr(complaint, key) for key in columns} for complaint in complaints
+    ])
+    apply_new_complaints(db, complaints)
+    # Counted, clustered and published once the chunk commits
+    count_patterns(db, complaints)
+    link_clusters(db, complaints)
+    publish_changes(db, complaints)
+    return len(complaints), errors
+
+
+def ingest_records(db: Session, records: Iterable[Tuple[int, object]], chunk_size: int = 1000) -> Dict:
+    """
+    Ingest (line_number, raw_record) pairs, committing every chunk_size valid
+    records. A chunk that fails as a whole is retried row by row so only the
+    offending rows are reported.
+    """
+    report = {"processed": 0, "inserted": 0, "failed": 0, "chunks": 0, "errors": []}
+
+    def record_errors(errors):
+        report["failed"] += len(errors)
+        room = MAX_REPORTED_ERRORS - len(report["errors"])
+        report["errors"].extend(errors[:max(room, 0)])
+
+    def flush(rows):
+        try:
+            inserted, errors = ingest_chunk(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            inserted, errors = 0, []
+            for line_no, record in rows:
+                try:
+                    row_inserted, row_errors = ingest_chunk(db, [(line_no, record)])
+                    db.commit()
+                    inserted += row_inserted
+                    errors.extend(row_errors)
+                except Exception as e:
+                    db.rollback()
+                    errors.append({"line": line_no, "error": str(e).splitlines()[0]})
+        report["inserted"] += inserted
+        report["chunks"] += 1
+        record_errors(errors)
+
+    pending: List[Tuple[int, Dict]] = []
+    for line_no, raw in records:
+        report["processed"] += 1
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            pending.append((line_no, normalize_record(raw)))
+        except ValueError as e:
+            record_errors([{"line": line_no, "error": str(e)}])
+            continue
+        if len(pending) >= chunk_size:
+            flush(pending)
+            pending = []
+    if pending:
+        flush(pending)
+
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
+
+
+def ingest_stream(db: Session, stream: TextIO, fmt: str = "ndjson", chunk_size: int = 1000) -> Dict:
+    """Parse an NDJSON/CSV text stream and ingest it"""
+    if fmt not in PARSERS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    report = ingest_records(db, PARSERS[fmt](stream), chunk_size)
+    return {"format": fmt, **report}
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal, migrate_db
+    import time
+
+    parser = argparse.ArgumentParser(description="Bulk-load complaints from an NDJSON or CSV feed")
+    parser.add_argument("path", help="Feed file, or - for stdin")
+    parser.add_argument("--format", choices=sorted(PARSERS), help="Defaults to the file extension, else ndjson")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Records per transaction")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    migrate_db()
+    db = SessionLocal()
+    started = time.monotonic()
+    try:
+        if args.path == "-":
+            report = ingest_stream(db, sys.stdin, fmt, args.chunk_size)
+        else:
+            with open(args.path, newline="", encoding="utf-8") as stream:
+                report = ingest_stream(db, stream, fmt, args.chunk_size)
+    finally:
+        db.close()
+    elapsed = time.monotonic() - started
+
+    for error in report["errors"]:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    print(f"Inserted {report['inserted']} of {report['processed']} records "
+          f"({report['failed']} failed) in {elapsed:.1f}s")
+    sys.exit(1 if report["failed"] else 0)
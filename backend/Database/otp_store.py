@@ -0,0 +1,179 @@
+"""
+OTP storage for victim complaint access.
+
+The backend is picked with OTP_STORE_BACKEND:
+
+    database   (default) the otps table; a new OTP replaces any earlier one
+               for the same phone x complaint, so there is one row per pair
+    memory     per-process TTL map for high-traffic periods; OTPs live only
+               in this API process and are lost on restart
+
+Either way OTPSweeper deletes expired rows in batches on a background
+thread, so the otps table stays bounded during scam waves. It can also run
+on its own:
+
+    python -m Database.otp_store --once
+"""
+from collections import OrderedDict
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Dict, Optional, Tuple
+import argparse
+import hmac
+import os
+import time
+
+from .database import SessionLocal, DatabaseManager
+from .async_database import AsyncDatabaseManager
+
+OTP_STORE_BACKEND = os.getenv("OTP_STORE_BACKEND", "database").lower()
+OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", 300))
+OTP_MEMORY_MAX_ENTRIES = int(os.getenv("OTP_MEMORY_MAX_ENTRIES", 100000))
+OTP_PURGE_BATCH_SIZE = int(os.getenv("OTP_PURGE_BATCH_SIZE", 1000))
+OTP_PURGE_INTERVAL_SECONDS = float(os.getenv("OTP_PURGE_INTERVAL_SECONDS", 60))
+
+
+class DatabaseOTPStore:
+    """OTPs in the otps table (shared by every API process)"""
+
+    name = "database"
+
+    async def issue(self, db, phone_number: str, complaint_id: str, otp_code: str,
+                    ttl_seconds: int = OTP_TTL_SECONDS):
+        await AsyncDatabaseManager.create_otp(db, phone_number, complaint_id, otp_code, ttl_seconds)
+
+    async def verify(self, db, phone_number: str, complaint_id: str, otp_code: str) -> bool:
+        return await AsyncDatabaseManager.verify_otp(db, phone_number, complaint_id, otp_code)
+
+    def purge_expired(self) -> int:
+        return 0  # rows are purged by OTPSweeper for every backend
+
+
+class MemoryOTPStore:
+    """
+    OTPs in a bounded in-process map: (phone, complaint) -> (code, expiry).
+    An OTP is removed when it is verified, replaced or expires; when the map
+    is full the oldest entries are evicted.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = OTP_MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    async def issue(self, db, phone_number: str, complaint_id: str, otp_code: str,
+                    ttl_seconds: int = OTP_TTL_SECONDS):
+        key = (phone_number, complaint_id)
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                self._purge_locked(time.monotonic())
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[key] = (otp_code, time.monotonic() + ttl_seconds)
+
+    async def verify(self, db, phone_number: str, complaint_id: str, otp_code: str) -> bool:
+        key = (phone_number, complaint_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            code, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False
+            if not hmac.compare_digest(code, otp_code):
+                return False
+            del self._entries[key]  # one-time use
+            return True
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._purge_locked(time.monotonic())
+
+    def _purge_locked(self, now: float) -> int:
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def store_from_env():
+    if OTP_STORE_BACKEND == "memory":
+        return MemoryOTPStore()
+    return DatabaseOTPStore()
+
+
+otp_store = store_from_env()
+
+
+class OTPSweeper:
+    """Background thread deleting expired OTPs, one batch (and commit) at a time"""
+
+    def __init__(self, store=None, batch_size: int = OTP_PURGE_BATCH_SIZE,
+                 interval: float = OTP_PURGE_INTERVAL_SECONDS):
+        self.store = store or otp_store
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def run_once(self) -> Dict[str, int]:
+        """Purge everything expired so far. Returns counts per backend."""
+        cutoff = datetime.utcnow()
+        deleted = 0
+        db = SessionLocal()
+        try:
+            while not self._stop.is_set():
+                batch = DatabaseManager.purge_expired_otps(db, cutoff, self.batch_size)
+                deleted += batch
+                if batch < self.batch_size:
+                    break
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        return {"database": deleted, "memory": self.store.purge_expired()}
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"OTP sweeper error: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Run the sweeper on a daemon thread inside this process"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self.run_forever, name="otp-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete expired OTPs")
+    parser.add_argument("--once", action="store_true", help="Purge once and exit")
+    args = parser.parse_args()
+
+    sweeper = OTPSweeper()
+    if args.once:
+        print(sweeper.run_once())
+    else:
+        print("OTP sweeper started")
+        try:
+            sweeper.run_forever()
+        except KeyboardInterrupt:
+            print("OTP sweeper stopped")
@@ -0,0 +1,44 @@
+from sqlalchemy import tuple_
+from datetime import datetime
+from typing import List, Optional, Tuple
+import base64
+import json
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode the (created_at, id) of the last row on a page as an opaque cursor"""
+    payload = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def keyset_page(query, model, cursor: Optional[str], limit: int):
+    """
+    Apply newest-first keyset pagination on (created_at, id) to a SELECT.
+
+    Rows are located by seeking past the cursor instead of skipping an
+    offset, so every page costs the same however deep it is. One extra row
+    is fetched to tell whether there is a next page.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < (created_at, row_id))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(rows: List, limit: int) -> Tuple[List, Optional[str]]:
+    """Trim the look-ahead row from a keyset_page result and build next_cursor"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
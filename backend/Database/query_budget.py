@@ -0,0 +1,134 @@
+"""
+Per-request SQL query budgets.
+
+Every statement sent through the sync or async engine is counted against
+the request (or block) that issued it. In test mode a request that goes
+over its endpoint's budget fails with a 500 naming the endpoint, so lazy
+loads and other N+1 regressions show up as failing requests:
+
+    QUERY_BUDGET_MODE=enforce   # fail over-budget requests (tests/CI)
+    QUERY_BUDGET_MODE=warn      # only log them
+    QUERY_BUDGET_MODE=off       # default, no middleware
+
+Endpoints declare their budget with @query_budget(n); the rest fall back to
+QUERY_BUDGET_DEFAULT. Scripts can check a block with max_queries(n).
+"""
+from sqlalchemy import event
+from contextlib import contextmanager
+from contextvars import ContextVar
+from starlette.datastructures import MutableHeaders
+from typing import List, Optional
+import json
+import os
+
+from .database import engine, read_engine
+from .async_database import async_engine, async_read_engine
+
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off").lower()
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", 20))
+
+# One mutable counter per request/block; copied contexts (threadpool routes,
+# tasks) share the same list, so their queries are counted too
+_query_counter: ContextVar[Optional[List[int]]] = ContextVar("query_counter", default=None)
+
+
+# Transaction control is not a query: SQLite's explicit BEGIN (see
+# install_sqlite_pragmas) would otherwise count against every request
+_TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "END")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by max_queries() when a block issues too many statements"""
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None and not statement.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+        counter[0] += 1
+
+
+for _engine in {engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine}:
+    event.listen(_engine, "before_cursor_execute", _count_statement)
+
+
+def query_budget(limit: int):
+    """Declare the most queries an endpoint may issue per request"""
+    def decorate(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return decorate
+
+
+@contextmanager
+def count_queries():
+    """Count the statements issued inside the block: with count_queries() as counter: ... counter[0]"""
+    counter = [0]
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+@contextmanager
+def max_queries(limit: int):
+    """Fail with QueryBudgetExceeded if the block issues more than limit statements"""
+    with count_queries() as counter:
+        yield counter
+    if counter[0] > limit:
+        raise QueryBudgetExceeded(f"{counter[0]} queries issued, budget is {limit}")
+
+
+class QueryBudgetMiddleware:
+    """
+    ASGI middleware counting the queries of each HTTP request.
+    Adds an X-Query-Count header and, in enforce mode, turns an over-budget
+    response into a 500.
+    """
+
+    def __init__(self, app, mode: str = QUERY_BUDGET_MODE, default_budget: int = QUERY_BUDGET_DEFAULT):
+        self.app = app
+        self.enforce = mode == "enforce"
+        self.default_budget = default_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = _query_counter.set(counter)
+        replaced = False
+
+        async def send_with_budget(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                endpoint = scope.get("endpoint")
+                budget = getattr(endpoint, "query_budget", self.default_budget)
+                MutableHeaders(scope=message)["X-Query-Count"] = str(counter[0])
+                if counter[0] > budget:
+                    detail = (f"Query budget exceeded: {scope['method']} {scope['path']} issued "
+                              f"{counter[0]} queries (budget {budget})")
+                    print(detail)
+                    if self.enforce:
+                        replaced = True
+                        body = json.dumps({"detail": detail}).encode()
+                        await send({
+                            "type": "http.response.start",
+                            "status": 500,
+                            "headers": [
+                                (b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode()),
+                                (b"x-query-count", str(counter[0]).encode()),
+                            ],
+                        })
+                        await send({"type": "http.response.body", "body": body})
+                        return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_budget)
+        finally:
+            _query_counter.reset(token)
@@ -0,0 +1,164 @@
+"""
+In-process result cache for the analytics endpoints.
+
+Entries are keyed on (endpoint, start_date, end_date, district), expire after
+a TTL and are evicted least-recently-used once the cache is full. For a grace
+period after expiry a stale entry is still served while one background task
+recomputes it (stale-while-revalidate) on the read engine, like the
+analytics routes themselves.
+
+Writes invalidate precisely: rollups.apply_complaint_change records the
+(day, district) it touched on the session, and once that session commits
+every cached window covering that day and district is dropped.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import date, datetime
+from threading import Lock
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import asyncio
+import os
+import time
+
+
+class AnalyticsCache:
+    """Bounded TTL + LRU cache with stale-while-revalidate and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 30.0, stale_ttl: float = 120.0,
+                 session_factory=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.session_factory = session_factory
+        # key -> (stored_at, value, window)
+        self._entries: "OrderedDict[Hashable, Tuple[float, object, Tuple]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._refreshing = set()
+        self._lock = Lock()
+        self.stats = dict.fromkeys(
+            ("hits", "stale_hits", "misses", "refreshes", "evictions", "invalidations"), 0
+        )
+
+    async def get_or_compute(self, key: Hashable, window: Tuple[date, date, Optional[str]],
+                             compute: Callable[[object], Awaitable], db):
+        """
+        Return the cached value for key, computing it with compute(db) on a miss.
+        window is (start_day, end_day, district) and drives invalidation.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                if age < self.ttl + self.stale_ttl and self.session_factory is not None:
+                    self._entries.move_to_end(key)
+                    self.stats["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        asyncio.get_running_loop().create_task(
+                            self._refresh(key, window, compute)
+                        )
+                    return entry[1]
+            self.stats["misses"] += 1
+
+        # Concurrent misses for the same key share one computation
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute(db)
+            self._store(key, value, window)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, day: date, district: Optional[str] = None):
+        """Drop every entry whose window covers day (and district, if it was filtered)"""
+        with self._lock:
+            for key in list(self._entries):
+                start, end, entry_district = self._entries[key][2]
+                if start <= day <= end and (entry_district is None or entry_district == district):
+                    del self._entries[key]
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "hit_rate": round((self.stats["hits"] + self.stats["stale_hits"]) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _store(self, key, value, window):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value, window)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    async def _refresh(self, key, window, compute):
+        try:
+            async with self.session_factory() as db:
+                value = await compute(db)
+            self._store(key, value, window)
+            with self._lock:
+                self.stats["refreshes"] += 1
+        except Exception as e:
+            print(f"Analytics cache refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+def _cache_from_env() -> AnalyticsCache:
+    from .async_database import AsyncReadSessionLocal
+    return AnalyticsCache(
+        max_entries=int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", 512)),
+        ttl=float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", 30)),
+        stale_ttl=float(os.getenv("ANALYTICS_CACHE_STALE_SECONDS", 120)),
+        session_factory=AsyncReadSessionLocal,
+    )
+
+
+# Shared cache used by routes/analytics.py
+analytics_cache = _cache_from_env()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_changes(session):
+    """Invalidate cached windows for rollup rows changed by this transaction"""
+    # Also fired when a savepoint is released; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    changes = session.info.pop("rollup_changes", None)
+    for day, district in changes or ():
+        analytics_cache.invalidate(day.date() if isinstance(day, datetime) else day, district)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session):
+    if session.in_nested_transaction():
+        return  # only a savepoint; the transaction is still open
+    session.info.pop("rollup_changes", None)
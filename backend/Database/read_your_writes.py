@@ -0,0 +1,101 @@
+"""
+Read-your-writes routing for the read engine.
+
+Analytics and listing routes read through get_read_db/get_async_read_db,
+which may lag the primary when READ_DATABASE_URL points at a replica. A
+client that must see its own write straight away can opt in per request:
+
+    X-Read-Your-Writes: true       # this read goes to the primary
+
+or, with READ_YOUR_WRITES_SECONDS > 0, ReadYourWritesMiddleware stamps a
+cookie on every successful write and reads carrying a recent stamp go to
+the primary for that many seconds.
+
+The dependencies live here, next to the middleware, so that database.py
+and async_database.py stay free of FastAPI.
+"""
+import math
+import os
+import time
+from typing import AsyncGenerator, Generator
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, ReadSessionLocal
+from .async_database import AsyncSessionLocal, AsyncReadSessionLocal
+
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 0))
+READ_YOUR_WRITES_HEADER = "x-read-your-writes"
+LAST_WRITE_COOKIE = "last_write_at"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def wants_primary(request: Request = None) -> bool:
+    """True if this request should read from the primary instead of the read engine"""
+    if request is None:
+        return False
+    if request.headers.get(READ_YOUR_WRITES_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    if READ_YOUR_WRITES_SECONDS <= 0:
+        return False
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < READ_YOUR_WRITES_SECONDS
+
+
+def read_session_factory(request: Request = None):
+    """ReadSessionLocal, or SessionLocal when the request asks to read its own writes"""
+    return SessionLocal if wants_primary(request) else ReadSessionLocal
+
+
+def get_read_db(request: Request = None) -> Generator[Session, None, None]:
+    """
+    Dependency for read-only routes (analytics, listings): sessions on the read engine.
+    Use with FastAPI: db: Session = Depends(get_read_db)
+    """
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def async_read_session_factory(request: Request = None):
+    """AsyncReadSessionLocal, or AsyncSessionLocal when the request asks to read its own writes"""
+    return AsyncSessionLocal if wants_primary(request) else AsyncReadSessionLocal
+
+
+async def get_async_read_db(request: Request = None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for read-only routes (analytics, listings): sessions on the read engine.
+    Use with FastAPI: db: AsyncSession = Depends(get_async_read_db)
+    """
+    async with async_read_session_factory(request)() as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware stamping the last-write cookie on successful write requests"""
+
+    def __init__(self, app, window_seconds: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.cookie_suffix = f"; Max-Age={math.ceil(window_seconds)}; Path=/; HttpOnly; SameSite=Lax"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_stamp(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = f"{LAST_WRITE_COOKIE}={time.time():.3f}{self.cookie_suffix}"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"set-cookie", cookie.encode())
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_stamp)
@@ -0,0 +1,252 @@
+"""
+Daily analytics rollups.
+
+The Analytics table holds one row per day x district x fraud type. Complaint
+create/update paths apply deltas to it in the same transaction, so the
+dashboard endpoints aggregate a few rows per day instead of scanning raw
+complaints. Rebuild from scratch (or for a date range) with:
+
+    python -m Database.rollups --rebuild [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+"""
+from sqlalchemy import select, delete, update, insert, func, case
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime, date, timedelta
+from typing import Dict, Optional, Tuple
+import argparse
+
+from .schema import Analytics, Complaint, CaseStatus
+
+COUNTERS = (
+    "total_cases",
+    "cases_resolved",
+    "cases_pending",
+    "total_amount_lost",
+    "total_amount_recovered",
+)
+
+
+def day_of(value) -> datetime:
+    """Truncate a datetime/date (or SQLite date string) to midnight"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return datetime(value.year, value.month, value.day)
+
+
+def snapshot(complaint: Complaint) -> Optional[Tuple[Tuple, Dict[str, float]]]:
+    """
+    Capture a complaint's contribution to the rollups as (key, counters).
+    Take one before changing a complaint and pass it to apply_complaint_change.
+    """
+    if complaint is None or complaint.created_at is None:
+        return None
+    fraud_type = complaint.fraud_type.value if hasattr(complaint.fraud_type, "value") else complaint.fraud_type
+    key = (day_of(complaint.created_at), complaint.district, fraud_type)
+    return key, {
+        "total_cases": 1,
+        "cases_resolved": 1 if complaint.status == CaseStatus.REFUNDED else 0,
+        "cases_pending": 1 if complaint.status == CaseStatus.PENDING else 0,
+        "total_amount_lost": complaint.amount_lost or 0.0,
+        "total_amount_recovered": complaint.amount_recovered or 0.0,
+    }
+
+
+def apply_complaint_change(db: Session, before, after):
+    """
+    Apply the difference between two snapshots to the rollup rows.
+    Use before=None for a new complaint. Does not commit - the caller's
+    transaction covers both the complaint and its rollup delta.
+    """
+    deltas: Dict[Tuple, Dict[str, float]] = {}
+    for sign, snap in ((-1, before), (1, after)):
+        if snap is None:
+            continue
+        key, counters = snap
+        row = deltas.setdefault(key, dict.fromkeys(COUNTERS, 0))
+        for name, value in counters.items():
+            row[name] += sign * value
+
+    for key, row in deltas.items():
+        if any(row.values()):
+            _add_to_row(db, key, row)
+        # Picked up after commit to invalidate cached analytics (query_cache).
+        # Recorded even without a counter delta, since the per-status
+        # breakdown changes on every status transition.
+        db.info.setdefault("rollup_changes", set()).add(key[:2])
+
+
+def apply_new_complaints(db: Session, complaints):
+    """
+    Roll up many new complaints at once, one row update per day x district x
+    fraud type. Used by bulk ingestion; does not commit.
+    """
+    deltas: Dict[Tuple, Dict[str, float]] = {}
+    for complaint in complaints:
+        snap = snapshot(complaint)
+        if snap is None:
+            continue
+        key, counters = snap
+        row = deltas.setdefault(key, dict.fromkeys(COUNTERS, 0))
+        for name, value in counters.items():
+            row[name] += value
+
+    for key, row in deltas.items():
+        _add_to_row(db, key, row)
+        db.info.setdefault("rollup_changes", set()).add(key[:2])
+
+
+def _add_to_row(db: Session, key: Tuple, delta: Dict[str, float]):
+    day, district, fraud_type = key
+    match = (
+        Analytics.date == day,
+        Analytics.district == district if district is not None else Analytics.district.is_(None),
+        Analytics.fraud_type == fraud_type,
+    )
+    result = db.execute(
+        update(Analytics).where(*match).values(
+            **{name: func.coalesce(getattr(Analytics, name), 0) + value for name, value in delta.items()}
+        ).execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(Analytics).values(
+                date=day, district=district, fraud_type=fraud_type,
+                created_at=datetime.utcnow(), **delta
+            ))
+    except IntegrityError:
+        # Another writer created the row first - add to it instead
+        _add_to_row(db, key, delta)
+
+
+def rebuild_rollups(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """
+    Recompute rollup rows from the complaints table, optionally for a day range
+    (inclusive). Returns the number of rows written. Does not commit.
+    """
+    day = func.date(Complaint.created_at)
+    query = select(
+        day,
+        Complaint.district,
+        Complaint.fraud_type,
+        func.count(Complaint.id),
+        func.sum(case((Complaint.status == CaseStatus.REFUNDED, 1), else_=0)),
+        func.sum(case((Complaint.status == CaseStatus.PENDING, 1), else_=0)),
+        func.sum(Complaint.amount_lost),
+        func.sum(func.coalesce(Complaint.amount_recovered, 0)),
+    ).where(Complaint.created_at.is_not(None)).group_by(day, Complaint.district, Complaint.fraud_type)
+
+    clear = delete(Analytics)
+    if start:
+        query = query.where(Complaint.created_at >= day_of(start))
+        clear = clear.where(Analytics.date >= day_of(start))
+    if end:
+        query = query.where(Complaint.created_at < day_of(end) + timedelta(days=1))
+        clear = clear.where(Analytics.date <= day_of(end))
+
+    db.execute(clear)
+    rows = [
+        {
+            "date": day_of(r[0]),
+            "district": r[1],
+            "fraud_type": r[2].value if hasattr(r[2], "value") else r[2],
+            "total_cases": r[3],
+            "cases_resolved": r[4] or 0,
+            "cases_pending": r[5] or 0,
+            "total_amount_lost": r[6] or 0.0,
+            "total_amount_recovered": r[7] or 0.0,
+            "created_at": datetime.utcnow(),
+        }
+        for r in db.execute(query)
+    ]
+    if rows:
+        db.execute(insert(Analytics), rows)
+    return len(rows)
+
+
+def ensure_rollups(db: Session):
+    """Backfill the rollups once if complaints exist but nothing was rolled up yet"""
+    if db.scalar(select(Analytics.id).limit(1)) is None and \
+            db.scalar(select(Complaint.id).limit(1)) is not None:
+        written = rebuild_rollups(db)
+        db.commit()
+        print(f"Backfilled {written} analytics rollup rows")
+
+
+# Read side - statements used by the analytics routes
+
+def _window(query, start: datetime, end: datetime, district: Optional[str] = None):
+    query = query.where(Analytics.date >= day_of(start), Analytics.date <= day_of(end))
+    if district:
+        query = query.where(Analytics.district == district)
+    return query
+
+
+def summary_statement(start: datetime, end: datetime, district: Optional[str] = None):
+    """total_cases, total_lost, total_recovered, resolved, pending for a day window"""
+    return _window(select(
+        func.sum(Analytics.total_cases),
+        func.sum(Analytics.total_amount_lost),
+        func.sum(Analytics.total_amount_recovered),
+        func.sum(Analytics.cases_resolved),
+        func.sum(Analytics.cases_pending),
+    ), start, end, district)
+
+
+def fraud_type_statement(start: datetime, end: datetime):
+    """fraud_type, count, total_amount per fraud type for a day window"""
+    return _window(select(
+        Analytics.fraud_type,
+        func.sum(Analytics.total_cases),
+        func.sum(Analytics.total_amount_lost),
+    ), start, end).group_by(Analytics.fraud_type).having(func.sum(Analytics.total_cases) > 0)
+
+
+def district_statement(start: datetime, end: datetime):
+    """district, cases, total_lost, total_recovered per district for a day window"""
+    cases = func.sum(Analytics.total_cases)
+    return _window(select(
+        Analytics.district,
+        cases,
+        func.sum(Analytics.total_amount_lost),
+        func.sum(Analytics.total_amount_recovered),
+    ), start, end).group_by(Analytics.district).having(cases > 0).order_by(cases.desc())
+
+
+def breakdown_statement(start: datetime, end: datetime, district: Optional[str] = None):
+    """
+    Every counter per district x fraud type for a day window. The dashboard
+    derives the summary and both breakdowns from this one result.
+    """
+    return _window(select(
+        Analytics.district,
+        Analytics.fraud_type,
+        func.sum(Analytics.total_cases),
+        func.sum(Analytics.cases_resolved),
+        func.sum(Analytics.cases_pending),
+        func.sum(Analytics.total_amount_lost),
+        func.sum(Analytics.total_amount_recovered),
+    ), start, end, district).group_by(Analytics.district, Analytics.fraud_type)
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal, migrate_db
+
+    parser = argparse.ArgumentParser(description="Maintain the analytics rollup table")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute rollups from complaints")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if not args.rebuild:
+        parser.error("nothing to do - pass --rebuild")
+
+    migrate_db()
+    db = SessionLocal()
+    try:
+        written = rebuild_rollups(db, args.start, args.end)
+        db.commit()
+        print(f"Rebuilt {written} analytics rollup rows")
+    finally:
+        db.close()
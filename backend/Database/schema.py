@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import sqlalchemy.orm as sql_orm
@@ -88,6 +88,10 @@ class Complaint(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     closed_at = Column(DateTime, nullable=True)
+    # Set when trigger_alerts runs
+    alerts_triggered_at = Column(DateTime, nullable=True)
+    # Alert sweeper lease; an expired lease is claimed again by a later sweep
+    alerts_claimed_at = Column(DateTime, nullable=True)
     
     # Flags
     is_golden_hour = Column(Boolean, default=False)  # Within 1 hour of fraud
@@ -100,9 +104,29 @@ class Complaint(Base):
     
     # Relationships
     victim = relationship("User", back_populates="complaints")
-    activities = relationship("CaseActivity", back_populates="complaint", cascade="all, delete-orphan")
+    # Newest first, as get_complaint_activity lists them (ix_case_activities_complaint_created)
+    activities = relationship("CaseActivity", back_populates="complaint", cascade="all, delete-orphan",
+                              order_by="desc(CaseActivity.created_at)")
     bank_actions = relationship("BankAction", back_populates="complaint", cascade="all, delete-orphan")
     notifications = relationship("Notification", back_populates="complaint", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pagination: ORDER BY created_at DESC, id DESC
+        Index("ix_complaints_created_at_id", "created_at", "id"),
+        # list_complaints: status + district filters, keyset order
+        Index("ix_complaints_status_district_created", "status", "district", "created_at", "id"),
+        # Analytics date windows with a district filter / list_complaints by district
+        Index("ix_complaints_district_created", "district", "created_at", "id"),
+        # Recent complaints against one accused account
+        Index("ix_complaints_accused_account_created", "accused_account", "created_at"),
+        # Alert sweeper: PENDING complaints inside the golden hour
+        Index("ix_complaints_status_transaction_date", "status", "transaction_date"),
+        # get_priority_cases: is_priority = true, newest first
+        Index("ix_complaints_priority_created", "is_priority", "created_at", "id"),
+        # DatabaseManager.get_analytics_summary is answered from this index alone
+        Index("ix_complaints_summary_covering",
+              "created_at", "district", "status", "amount_lost", "amount_recovered"),
+    )
 
 class CaseActivity(Base):
     __tablename__ = "case_activities"
@@ -120,6 +144,11 @@ class CaseActivity(Base):
     # Relationships
     complaint = relationship("Complaint", back_populates="activities")
     user = relationship("User", back_populates="activities")
+    
+    __table_args__ = (
+        # get_complaint_activity: WHERE complaint_id = ? ORDER BY created_at DESC
+        Index("ix_case_activities_complaint_created", "complaint_id", "created_at"),
+    )
 
 class BankAction(Base):
     __tablename__ = "bank_actions"
@@ -151,11 +180,24 @@ class Notification(Base):
     recipient = Column(String(255), nullable=False)  # Phone or email
     message = Column(Text, nullable=False)
     
-    sent_at = Column(DateTime, default=datetime.utcnow)
-    status = Column(String(50), default="SENT")  # SENT, DELIVERED, FAILED
+    # Outbox state - rows are written PENDING and delivered by the notification worker
+    status = Column(String(50), default="PENDING")  # PENDING, SENDING, SENT, DELIVERED, FAILED
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)  # Retry time, or lease expiry while SENDING
+    claim_token = Column(String(32))
+    last_error = Column(Text)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+    delivered_at = Column(DateTime)
     
     # Relationships
     complaint = relationship("Complaint", back_populates="notifications")
+    
+    __table_args__ = (
+        # Worker claim query: status IN (PENDING, SENDING) AND next_attempt_at <= now
+        Index("ix_notifications_status_next_attempt", "status", "next_attempt_at"),
+    )
 
 class Analytics(Base):
     __tablename__ = "analytics"
@@ -173,18 +215,30 @@ class Analytics(Base):
     fraud_type = Column(String(50))
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # One rollup row per day x district x fraud type (see Database/rollups.py)
+    __table_args__ = (
+        Index("ux_analytics_date_district_fraud_type", "date", "district", "fraud_type", unique=True),
+    )
 
 class OTP(Base):
     __tablename__ = "otps"
     
     id = Column(Integer, primary_key=True, index=True)
-    phone_number = Column(String(15), nullable=False, index=True)
+    phone_number = Column(String(15), nullable=False)
     otp_code = Column(String(6), nullable=False)
     complaint_id = Column(String(50), nullable=False)
     
     is_verified = Column(Boolean, default=False)
     expires_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # OTP lookup/supersede for one phone x complaint (also serves phone-only lookups)
+        Index("ix_otps_phone_complaint_expires", "phone_number", "complaint_id", "expires_at"),
+        # Expired-row purge (Database/otp_store.py)
+        Index("ix_otps_expires_at", "expires_at"),
+    )
 
 class SystemLog(Base):
     __tablename__ = "system_logs"
@@ -0,0 +1,136 @@
+"""
+In-process cache of user profiles for login and /api/auth/me.
+
+Profiles (id, phone_number, role, full_name) are cached by user id with a
+phone number index, evicted least-recently-used once the cache is full and
+refreshed after a TTL as a backstop.
+
+Updates invalidate precisely: the User after_update/after_delete mapper
+events drop the user's entry straight away and again once the session
+commits, so a read racing the transaction cannot keep a stale profile.
+Bulk UPDATE statements bypass mapper events; call user_cache.invalidate()
+after those.
+"""
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+import os
+import time
+
+from .schema import User
+
+
+def user_profile(user: User) -> Dict:
+    """The cached (and /me) view of a user"""
+    return {
+        "id": user.id,
+        "phone_number": user.phone_number,
+        "role": user.role,
+        "full_name": user.full_name
+    }
+
+
+class UserCache:
+    """Bounded TTL + LRU cache of user profiles keyed by id and phone number"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # user id -> (stored_at, profile)
+        self._entries: "OrderedDict[int, Tuple[float, Dict]]" = OrderedDict()
+        self._by_phone: Dict[str, int] = {}
+        self._lock = Lock()
+        self.stats = dict.fromkeys(("hits", "misses", "evictions", "invalidations"), 0)
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        with self._lock:
+            return self._get_locked(user_id)
+
+    def get_by_phone(self, phone_number: str) -> Optional[Dict]:
+        with self._lock:
+            user_id = self._by_phone.get(phone_number)
+            if user_id is None:
+                self.stats["misses"] += 1
+                return None
+            return self._get_locked(user_id)
+
+    def put(self, profile: Dict):
+        with self._lock:
+            self._drop_locked(profile["id"])
+            self._entries[profile["id"]] = (time.monotonic(), dict(profile))
+            self._by_phone[profile["phone_number"]] = profile["id"]
+            while len(self._entries) > self.max_entries:
+                user_id, (_, evicted) = self._entries.popitem(last=False)
+                self._unindex_locked(user_id, evicted["phone_number"])
+                self.stats["evictions"] += 1
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            if self._drop_locked(user_id):
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_phone.clear()
+
+    def snapshot_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "max_entries": self.max_entries}
+
+    def _get_locked(self, user_id: int) -> Optional[Dict]:
+        entry = self._entries.get(user_id)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            if entry is not None:
+                self._drop_locked(user_id)
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.stats["hits"] += 1
+        return dict(entry[1])
+
+    def _drop_locked(self, user_id: int) -> bool:
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return False
+        self._unindex_locked(user_id, entry[1]["phone_number"])
+        return True
+
+    def _unindex_locked(self, user_id: int, phone_number: str):
+        if self._by_phone.get(phone_number) == user_id:
+            del self._by_phone[phone_number]
+
+
+# Shared cache used by routes/auth.py
+user_cache = UserCache(
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000)),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", 300)),
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    """Drop the user now and remember to drop it again when the session commits"""
+    user_cache.invalidate(target.id)
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    # Also fired when a savepoint is released; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    for user_id in session.info.pop("changed_user_ids", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_users(session):
+    if session.in_nested_transaction():
+        return  # only a savepoint; the transaction is still open
+    session.info.pop("changed_user_ids", None)
@@ -13,7 +13,27 @@ from routes.complaints import router as complaints_router
 from routes.auth import router as auth_router
 from routes.alerts import router as alerts_router
 from routes.analytics import router as analytics_router
-from Database.database import check_db_connection, init_db
+from routes.events import router as events_router
+from Database.change_feed import change_feed
+from Database.database import check_db_connection, migrate_db, get_db_context
+from Database.rollups import ensure_rollups
+from Alerts.pattern_counters import pattern_counters
+from Alerts.mule_network import mule_network
+from Database.async_database import async_engine, async_read_engine
+from Database.read_your_writes import ReadYourWritesMiddleware, READ_YOUR_WRITES_SECONDS
+from Database.query_budget import QueryBudgetMiddleware, QUERY_BUDGET_MODE
+from Alerts.alert_jobs import alert_job_queue
+from Alerts.alert_sweeper import alert_sweeper
+from Alerts.dispatcher import alert_dispatcher
+from Alerts.notification_worker import worker_from_env
+from Database.otp_store import OTPSweeper
+
+# In-process outbox worker (run `python -m Alerts.notification_worker` instead
+# to deliver notifications from a separate process)
+notification_worker = worker_from_env()
+
+# Deletes expired OTPs in batches
+otp_sweeper = OTPSweeper()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -31,23 +51,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count SQL statements per request (QUERY_BUDGET_MODE=enforce in tests)
+if QUERY_BUDGET_MODE != "off":
+    app.add_middleware(QueryBudgetMiddleware)
+
+# Route a client's reads to the primary for a while after it writes
+if READ_YOUR_WRITES_SECONDS > 0:
+    app.add_middleware(ReadYourWritesMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["Auth"])
 app.include_router(complaints_router, prefix="/api/complaints", tags=["Complaints"])
 app.include_router(alerts_router, prefix="/api/alerts", tags=["Alerts"])
 app.include_router(analytics_router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(events_router, prefix="/api/events", tags=["Events"])
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
     print("Starting Cyber Fraud Support System API...")
-    if not os.path.exists("cyber_fraud.db"):
-        print("Initializing database...")
-        init_db()
+    # Creates missing tables/columns/indexes on any backend (SQLite or PostgreSQL)
+    migrate_db()
+    with get_db_context() as db:
+        ensure_rollups(db)
+        pattern_counters.warm_up(db)
     if check_db_connection():
         print("✓ Database connection successful")
     else:
         print("✗ Database connection failed")
+    if os.getenv("NOTIFICATION_WORKER_ENABLED", "true").lower() == "true":
+        notification_worker.start()
+    if os.getenv("OTP_SWEEPER_ENABLED", "true").lower() == "true":
+        otp_sweeper.start()
+    if os.getenv("ALERT_SWEEPER_ENABLED", "true").lower() == "true":
+        alert_sweeper.start()
+    change_feed.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Let queued alert jobs and deliveries finish before the process exits"""
+    notification_worker.stop()
+    otp_sweeper.stop()
+    alert_sweeper.stop()
+    change_feed.stop()
+    alert_job_queue.shutdown(wait=True)
+    alert_dispatcher.shutdown(wait=True)
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
 
 @app.get("/")
 async def root():
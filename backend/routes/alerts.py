@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from Database.database import SessionLocal, DatabaseManager
+from Database.query_budget import query_budget
 from Alerts.alert_authority import AlertAuthorities
+from Alerts.alert_jobs import alert_job_queue
+from Alerts.mule_network import mule_network, MULE_CLUSTER_MIN_SIZE
 
 router = APIRouter()
 
@@ -17,6 +21,9 @@ class AlertResponse(BaseModel):
     message: str
 
 # Dependency
+# AlertAuthorities works on a synchronous session and blocks on SMTP/SMS calls,
+# so the routes that use it are plain `def` and FastAPI runs them in its
+# threadpool instead of on the event loop.
 def get_db():
     db = SessionLocal()
     try:
@@ -24,8 +31,32 @@ def get_db():
     finally:
         db.close()
 
+def _format_alerts(alerts_result: dict) -> dict:
+    """Shape the trigger_alerts result into the per-alert response payload"""
+    alerts = []
+    for alert_type, success in alerts_result.items():
+        alerts.append({
+            "alert_type": alert_type,
+            "status": success,
+            "message": f"Alert '{alert_type}' {'sent successfully' if success else 'failed'}"
+        })
+    
+    return {
+        "alerts": alerts,
+        "summary": {
+            "total_alerts": len(alerts),
+            "successful": sum(1 for a in alerts if a["status"]),
+            "failed": sum(1 for a in alerts if not a["status"])
+        }
+    }
+
 @router.post("/trigger")
-async def trigger_alerts(request: TriggerAlertsRequest, db: Session = Depends(get_db)):
+@query_budget(20)
+def trigger_alerts(
+    request: TriggerAlertsRequest,
+    background: bool = Query(False, description="Queue the alerts and return a job id immediately"),
+    db: Session = Depends(get_db)
+):
     """
     Trigger alerts for a complaint.
     
@@ -39,41 +70,80 @@ async def trigger_alerts(request: TriggerAlertsRequest, db: Session = Depends(ge
     
     **Parameters:**
     - complaint_id: ID of the complaint to trigger alerts for
+    - background: If true, queue the alerts and return a job id at once.
+      Poll GET /api/alerts/jobs/{job_id} for the per-alert results.
     """
     try:
         complaint = DatabaseManager.get_complaint_by_id(db, request.complaint_id)
         if not complaint:
             raise HTTPException(status_code=404, detail="Complaint not found")
         
+        if background:
+            job = alert_job_queue.enqueue(
+                request.complaint_id, complaint.transaction_date, complaint.amount_lost
+            )
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "complaint_id": request.complaint_id,
+                    "job_id": job["job_id"],
+                    "status": job["status"],
+                    "priority_band": job["priority_band"],
+                    "status_url": f"/api/alerts/jobs/{job['job_id']}"
+                }
+            )
+        
         # Trigger alerts
         alerter = AlertAuthorities(db)
         alerts_result = alerter.trigger_alerts(request.complaint_id)
         
-        # Format response
-        alerts = []
-        for alert_type, success in alerts_result.items():
-            alerts.append({
-                "alert_type": alert_type,
-                "status": success,
-                "message": f"Alert '{alert_type}' {'sent successfully' if success else 'failed'}"
-            })
-        
         return {
             "complaint_id": request.complaint_id,
-            "alerts": alerts,
-            "summary": {
-                "total_alerts": len(alerts),
-                "successful": sum(1 for a in alerts if a["status"]),
-                "failed": sum(1 for a in alerts if not a["status"])
-            }
+            **_format_alerts(alerts_result)
         }
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/jobs/metrics")
+async def get_alert_job_metrics():
+    """
+    Alert scheduler metrics: queued and running jobs, and queue wait time
+    (mean, p50, p95, max over recent jobs) per priority band.
+    """
+    return alert_job_queue.metrics()
+
+@router.get("/jobs/{job_id}")
+async def get_alert_job(job_id: str):
+    """
+    Get the status of a queued alert job.
+    
+    Once the job is COMPLETED the per-alert results are included in the
+    same format as the synchronous /trigger response.
+    """
+    job = alert_job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Alert job not found")
+    
+    response = {
+        "job_id": job["job_id"],
+        "complaint_id": job["complaint_id"],
+        "status": job["status"],
+        "priority_band": job["priority_band"],
+        "queued_at": job["queued_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"]
+    }
+    if job["alerts"] is not None:
+        response.update(_format_alerts(job["alerts"]))
+    if job["error"]:
+        response["error"] = job["error"]
+    return response
+
 @router.post("/golden-hour")
-async def send_golden_hour_alert(request: TriggerAlertsRequest, db: Session = Depends(get_db)):
+@query_budget(3)
+def send_golden_hour_alert(request: TriggerAlertsRequest, db: Session = Depends(get_db)):
     """
     Send urgent golden hour alert (for frauds within 1 hour).
     
@@ -85,7 +155,8 @@ async def send_golden_hour_alert(request: TriggerAlertsRequest, db: Session = De
             raise HTTPException(status_code=404, detail="Complaint not found")
         
         alerter = AlertAuthorities(db)
-        success = alerter._send_golden_hour_alert(complaint)
+        with DatabaseManager.unit_of_work(db):
+            success = alerter._send_golden_hour_alert(complaint)
         
         return {
             "complaint_id": request.complaint_id,
@@ -99,7 +170,8 @@ async def send_golden_hour_alert(request: TriggerAlertsRequest, db: Session = De
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/bank-freeze")
-async def send_bank_freeze_alert(request: TriggerAlertsRequest, db: Session = Depends(get_db)):
+@query_budget(5)
+def send_bank_freeze_alert(request: TriggerAlertsRequest, db: Session = Depends(get_db)):
     """
     Send urgent bank account freeze request.
     
@@ -114,7 +186,8 @@ async def send_bank_freeze_alert(request: TriggerAlertsRequest, db: Session = De
             raise HTTPException(status_code=400, detail="Accused account information missing")
         
         alerter = AlertAuthorities(db)
-        success = alerter._send_bank_freeze_request(complaint)
+        with DatabaseManager.unit_of_work(db):
+            success = alerter._send_bank_freeze_request(complaint)
         
         return {
             "complaint_id": request.complaint_id,
@@ -130,7 +203,8 @@ async def send_bank_freeze_alert(request: TriggerAlertsRequest, db: Session = De
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{complaint_id}/status")
-async def get_alert_status(complaint_id: str, db: Session = Depends(get_db)):
+@query_budget(1)
+def get_alert_status(complaint_id: str, db: Session = Depends(get_db)):
     """Get the current alert/action status of a complaint."""
     try:
         complaint = DatabaseManager.get_complaint_by_id(db, complaint_id)
@@ -148,3 +222,67 @@ async def get_alert_status(complaint_id: str, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/notifications/{notification_id}/delivered")
+@query_budget(2)
+def record_delivery_receipt(notification_id: int, db: Session = Depends(get_db)):
+    """
+    Delivery receipt callback for the SMS/email gateways.
+    
+    The notification worker hands each message to the gateway with the
+    notification id as its reference; the gateway calls back here once the
+    message reached the recipient, moving the row from SENT to DELIVERED.
+    """
+    try:
+        notification = DatabaseManager.mark_notification_delivered(db, notification_id)
+        if not notification:
+            raise HTTPException(status_code=404, detail="Notification not found")
+        
+        return {
+            "notification_id": notification.id,
+            "status": notification.status,
+            "delivered_at": notification.delivered_at
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{complaint_id}/cluster")
+def get_complaint_cluster(
+    complaint_id: str,
+    limit: int = Query(100, ge=1, le=1000, description="Max complaints/identifiers to list"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the mule-network cluster of a complaint: every complaint linked to it
+    through shared accounts, UPI handles or transaction ids, with the
+    cluster's size and total loss. Served from memory after catching up with
+    complaints committed by other workers.
+    """
+    if not mule_network.ensure(db, complaint_id):
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    cluster = mule_network.cluster(complaint_id, limit)
+    if cluster is None:
+        raise HTTPException(status_code=503, detail="Cluster not loaded yet, retry shortly")
+    return cluster
+
+@router.post("/clusters/rebuild")
+def rebuild_clusters(
+    flag_priority: bool = Query(False, description="Mark complaints in network clusters as priority"),
+    db: Session = Depends(get_db)
+):
+    """
+    Rebuild the mule-network clusters from the complaints table.
+    
+    With flag_priority, every complaint in a cluster of at least
+    MULE_CLUSTER_MIN_SIZE complaints is marked as a priority case.
+    """
+    try:
+        result = mule_network.rebuild(db)
+        if flag_priority:
+            result["flagged_priority"] = mule_network.flag_priority(db)
+            db.commit()
+        return {**result, "min_cluster_size": MULE_CLUSTER_MIN_SIZE}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
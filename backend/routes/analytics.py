@@ -1,25 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime, timedelta
-from Database.database import SessionLocal, DatabaseManager
+from Database.async_database import AsyncDatabaseManager
+from Database.read_your_writes import get_async_read_db, async_read_session_factory
+from Database.database import DatabaseManager
+from Database.pagination import keyset_page, split_page
+from Database import rollups
+from Database.query_cache import analytics_cache
+from Database.export import MEDIA_TYPES, analytics_export_statement, stream_export
+from Database.query_budget import query_budget
 
 router = APIRouter()
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/summary")
+@query_budget(2)
 async def get_analytics_summary(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     district: Optional[str] = None,
-    db: Session = Depends(get_db)
+    include_status: bool = Query(False, description="Add a count for every case status"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get analytics summary for complaints.
@@ -28,6 +31,11 @@ async def get_analytics_summary(
     - start_date: Start date (YYYY-MM-DD format), defaults to 30 days ago
     - end_date: End date (YYYY-MM-DD format), defaults to today
     - district: Filter by specific district
+    - include_status: Add by_status, counted by one conditional aggregation
+      answered from the covering summary index
+    
+    Served from the daily rollups, so the window is whole days. Results are
+    cached briefly and invalidated when a complaint in the window changes.
     
     **Returns:**
     - total_cases: Total number of cases
@@ -35,6 +43,7 @@ async def get_analytics_summary(
     - total_recovered: Total amount recovered
     - resolved: Number of resolved cases
     - pending: Number of pending cases
+    - by_status: Cases per status (only with include_status)
     """
     try:
         # Parse dates
@@ -48,61 +57,86 @@ async def get_analytics_summary(
         else:
             start = end - timedelta(days=30)
         
-        summary = DatabaseManager.get_analytics_summary(db, start, end, district)
-        
-        if not summary:
-            return {
-                "total_cases": 0,
-                "total_lost": 0,
-                "total_recovered": 0,
-                "resolved": 0,
-                "pending": 0,
+        async def compute(db):
+            summary = (await db.execute(rollups.summary_statement(start, end, district))).first()
+            
+            if not summary:
+                return {
+                    "total_cases": 0,
+                    "total_lost": 0,
+                    "total_recovered": 0,
+                    "resolved": 0,
+                    "pending": 0,
+                    "period": {
+                        "start_date": start.date(),
+                        "end_date": end.date(),
+                        "district": district or "all"
+                    }
+                }
+            
+            response = {
+                "total_cases": summary[0] or 0,
+                "total_lost": float(summary[1] or 0),
+                "total_recovered": float(summary[2] or 0),
+                "resolved": summary[3] or 0,
+                "pending": summary[4] or 0,
+                "recovery_rate": f"{((float(summary[2] or 0) / float(summary[1] or 1)) * 100):.2f}%",
                 "period": {
                     "start_date": start.date(),
                     "end_date": end.date(),
                     "district": district or "all"
                 }
             }
+            
+            if include_status:
+                # Same whole-day window as the rollups
+                exact = await AsyncDatabaseManager.get_analytics_summary(
+                    db,
+                    datetime.combine(start.date(), datetime.min.time()),
+                    datetime.combine(end.date(), datetime.max.time()),
+                    district
+                )
+                response["by_status"] = DatabaseManager.status_breakdown(exact)
+            
+            return response
         
-        return {
-            "total_cases": summary[0] or 0,
-            "total_lost": float(summary[1] or 0),
-            "total_recovered": float(summary[2] or 0),
-            "resolved": summary[3] or 0,
-            "pending": summary[4] or 0,
-            "recovery_rate": f"{((float(summary[2] or 0) / float(summary[1] or 1)) * 100):.2f}%",
-            "period": {
-                "start_date": start.date(),
-                "end_date": end.date(),
-                "district": district or "all"
-            }
-        }
+        return await analytics_cache.get_or_compute(
+            ("summary+status" if include_status else "summary", start.date(), end.date(), district),
+            (start.date(), end.date(), district),
+            compute, db
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/by-status")
+@query_budget(2)
 async def get_cases_by_status(
     status: str = Query(..., description="Case status (PENDING, ASSIGNED, FIR_REGISTERED, REFUNDED)"),
     limit: int = Query(50, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    offset: int = Query(0, ge=0, description="Deprecated - use cursor"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Get cases filtered by status with pagination.
+    Get cases filtered by status with pagination, newest first.
     
     **Parameters:**
     - status: Filter by status
     - limit: Number of results (max 500)
-    - offset: Pagination offset
+    - cursor: Opaque cursor returned as next_cursor; omit for the first page
+    - offset: Legacy offset pagination, ignored when cursor is given
     """
     try:
-        cases = DatabaseManager.get_cases_by_status(db, status, limit, offset)
+        cases, next_cursor = await AsyncDatabaseManager.get_cases_by_status(
+            db, status, limit, offset, cursor
+        )
         
         return {
             "status": status,
             "limit": limit,
             "offset": offset,
             "total": len(cases),
+            "next_cursor": next_cursor,
             "cases": [
                 {
                     "complaint_id": c.complaint_id,
@@ -122,17 +156,14 @@ async def get_cases_by_status(
 async def get_fraud_type_statistics(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get statistics grouped by fraud type.
     
-    Shows the count and total amount for each fraud type.
+    Shows the count and total amount for each fraud type, from the daily rollups.
     """
     try:
-        from Database.schema import Complaint
-        from sqlalchemy import func
-        
         # Parse dates
         if end_date:
             end = datetime.strptime(end_date, "%Y-%m-%d")
@@ -144,33 +175,31 @@ async def get_fraud_type_statistics(
         else:
             start = end - timedelta(days=30)
         
-        # Query fraud types
-        query = db.query(
-            Complaint.fraud_type,
-            func.count(Complaint.id).label('count'),
-            func.sum(Complaint.amount_lost).label('total_amount')
-        ).filter(
-            Complaint.created_at >= start,
-            Complaint.created_at <= end
-        ).group_by(Complaint.fraud_type)
-        
-        results = query.all()
+        async def compute(db):
+            # Query fraud types
+            results = (await db.execute(rollups.fraud_type_statement(start, end))).all()
+            
+            return {
+                "period": {
+                    "start_date": start.date(),
+                    "end_date": end.date()
+                },
+                "fraud_types": [
+                    {
+                        "fraud_type": r[0].value if hasattr(r[0], 'value') else str(r[0]),
+                        "count": r[1],
+                        "total_amount": float(r[2] or 0),
+                        "average_amount": float((r[2] or 0) / r[1]) if r[1] > 0 else 0
+                    }
+                    for r in results
+                ]
+            }
         
-        return {
-            "period": {
-                "start_date": start.date(),
-                "end_date": end.date()
-            },
-            "fraud_types": [
-                {
-                    "fraud_type": r[0].value if hasattr(r[0], 'value') else str(r[0]),
-                    "count": r[1],
-                    "total_amount": float(r[2] or 0),
-                    "average_amount": float((r[2] or 0) / r[1]) if r[1] > 0 else 0
-                }
-                for r in results
-            ]
-        }
+        return await analytics_cache.get_or_compute(
+            ("fraud-types", start.date(), end.date(), None),
+            (start.date(), end.date(), None),
+            compute, db
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -178,15 +207,12 @@ async def get_fraud_type_statistics(
 async def get_cases_by_district(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Get statistics grouped by district.
+    Get statistics grouped by district, from the daily rollups.
     """
     try:
-        from Database.schema import Complaint
-        from sqlalchemy import func
-        
         # Parse dates
         if end_date:
             end = datetime.strptime(end_date, "%Y-%m-%d")
@@ -198,58 +224,69 @@ async def get_cases_by_district(
         else:
             start = end - timedelta(days=30)
         
-        # Query by district
-        query = db.query(
-            Complaint.district,
-            func.count(Complaint.id).label('count'),
-            func.sum(Complaint.amount_lost).label('total_lost'),
-            func.sum(Complaint.amount_recovered).label('total_recovered')
-        ).filter(
-            Complaint.created_at >= start,
-            Complaint.created_at <= end
-        ).group_by(Complaint.district).order_by(func.count(Complaint.id).desc())
-        
-        results = query.all()
+        async def compute(db):
+            # Query by district
+            results = (await db.execute(rollups.district_statement(start, end))).all()
+            
+            return {
+                "period": {
+                    "start_date": start.date(),
+                    "end_date": end.date()
+                },
+                "districts": [
+                    {
+                        "district": r[0],
+                        "cases": r[1],
+                        "total_lost": float(r[2] or 0),
+                        "total_recovered": float(r[3] or 0),
+                        "recovery_rate": f"{((float(r[3] or 0) / float(r[2] or 1)) * 100):.2f}%"
+                    }
+                    for r in results
+                ]
+            }
         
-        return {
-            "period": {
-                "start_date": start.date(),
-                "end_date": end.date()
-            },
-            "districts": [
-                {
-                    "district": r[0],
-                    "cases": r[1],
-                    "total_lost": float(r[2] or 0),
-                    "total_recovered": float(r[3] or 0),
-                    "recovery_rate": f"{((float(r[3] or 0) / float(r[2] or 1)) * 100):.2f}%"
-                }
-                for r in results
-            ]
-        }
+        return await analytics_cache.get_or_compute(
+            ("by-district", start.date(), end.date(), None),
+            (start.date(), end.date(), None),
+            compute, db
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/priority-cases")
+@query_budget(2)
 async def get_priority_cases(
     limit: int = Query(50, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Count all priority cases (false skips the COUNT)"),
+    offset: int = Query(0, ge=0, description="Deprecated - use cursor"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    Get high-priority cases (organized fraud patterns detected).
+    Get high-priority cases (organized fraud patterns detected), newest first.
+    
+    Paginate with the returned next_cursor. Pass include_total=false to skip
+    counting every priority case (total is then null).
     """
     try:
         from Database.schema import Complaint
+        from sqlalchemy import func
+        
+        query = select(Complaint).where(Complaint.is_priority == True)
+        total = None
+        if include_total:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
         
-        query = db.query(Complaint).filter(Complaint.is_priority == True)
-        total = query.count()
-        cases = query.order_by(Complaint.created_at.desc()).offset(offset).limit(limit).all()
+        page = keyset_page(query, Complaint, cursor, limit)
+        if offset and not cursor:
+            page = page.offset(offset)
+        cases, next_cursor = split_page((await db.scalars(page)).all(), limit)
         
         return {
             "total": total,
             "limit": limit,
             "offset": offset,
+            "next_cursor": next_cursor,
             "priority_cases": [
                 {
                     "complaint_id": c.complaint_id,
@@ -264,3 +301,168 @@ async def get_priority_cases(
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/dashboard")
+@query_budget(2)
+async def get_dashboard(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    district: Optional[str] = None,
+    priority_limit: int = Query(10, ge=0, le=100),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Everything a dashboard load needs in one request.
+    
+    The summary, fraud type and district breakdowns are all derived from a
+    single pass over the daily rollups for the window (cached like the
+    individual endpoints). The newest priority cases come from one indexed
+    lookup and are always fresh.
+    
+    **Parameters:**
+    - start_date: Start date (YYYY-MM-DD format), defaults to 30 days ago
+    - end_date: End date (YYYY-MM-DD format), defaults to today
+    - district: Restrict every breakdown to one district
+    - priority_limit: Number of newest priority cases to include (default 10)
+    """
+    try:
+        from Database.schema import Complaint
+        
+        # Parse dates
+        if end_date:
+            end = datetime.strptime(end_date, "%Y-%m-%d")
+        else:
+            end = datetime.now()
+        
+        if start_date:
+            start = datetime.strptime(start_date, "%Y-%m-%d")
+        else:
+            start = end - timedelta(days=30)
+        
+        async def compute(db):
+            rows = (await db.execute(rollups.breakdown_statement(start, end, district))).all()
+            
+            totals = dict.fromkeys(("cases", "resolved", "pending", "lost", "recovered"), 0)
+            fraud_types = {}
+            districts = {}
+            for row_district, fraud_type, cases, resolved, pending, lost, recovered in rows:
+                if not cases:
+                    continue
+                lost, recovered = float(lost or 0), float(recovered or 0)
+                for key, value in (("cases", cases), ("resolved", resolved or 0), ("pending", pending or 0),
+                                   ("lost", lost), ("recovered", recovered)):
+                    totals[key] += value
+                by_type = fraud_types.setdefault(fraud_type, {"count": 0, "total_amount": 0.0})
+                by_type["count"] += cases
+                by_type["total_amount"] += lost
+                by_district = districts.setdefault(row_district, {"cases": 0, "total_lost": 0.0, "total_recovered": 0.0})
+                by_district["cases"] += cases
+                by_district["total_lost"] += lost
+                by_district["total_recovered"] += recovered
+            
+            return {
+                "summary": {
+                    "total_cases": totals["cases"],
+                    "total_lost": totals["lost"],
+                    "total_recovered": totals["recovered"],
+                    "resolved": totals["resolved"],
+                    "pending": totals["pending"],
+                    "recovery_rate": f"{((totals['recovered'] / (totals['lost'] or 1)) * 100):.2f}%"
+                },
+                "fraud_types": [
+                    {
+                        "fraud_type": fraud_type,
+                        "count": v["count"],
+                        "total_amount": v["total_amount"],
+                        "average_amount": v["total_amount"] / v["count"]
+                    }
+                    for fraud_type, v in sorted(fraud_types.items())
+                ],
+                "districts": [
+                    {
+                        "district": name,
+                        "cases": v["cases"],
+                        "total_lost": v["total_lost"],
+                        "total_recovered": v["total_recovered"],
+                        "recovery_rate": f"{((v['total_recovered'] / (v['total_lost'] or 1)) * 100):.2f}%"
+                    }
+                    for name, v in sorted(districts.items(), key=lambda item: -item[1]["cases"])
+                ]
+            }
+        
+        breakdowns = await analytics_cache.get_or_compute(
+            ("dashboard", start.date(), end.date(), district),
+            (start.date(), end.date(), district),
+            compute, db
+        )
+        
+        priority_cases = []
+        if priority_limit:
+            priority_cases = (await db.scalars(
+                select(Complaint).where(Complaint.is_priority == True)
+                .order_by(Complaint.created_at.desc(), Complaint.id.desc())
+                .limit(priority_limit)
+            )).all()
+        
+        return {
+            "period": {
+                "start_date": start.date(),
+                "end_date": end.date(),
+                "district": district or "all"
+            },
+            **breakdowns,
+            "priority_cases": [
+                {
+                    "complaint_id": c.complaint_id,
+                    "fraud_type": c.fraud_type.value if hasattr(c.fraud_type, 'value') else str(c.fraud_type),
+                    "amount_lost": c.amount_lost,
+                    "accused_account": c.accused_account[-4:] + "****" if c.accused_account else None,
+                    "accused_bank": c.accused_bank,
+                    "created_at": c.created_at
+                }
+                for c in priority_cases
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export")
+async def export_analytics(
+    request: Request,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    district: Optional[str] = None,
+    format: str = Query("csv", description="csv or ndjson")
+):
+    """
+    Download the daily rollup rows (day x district x fraud type) for a window.
+    
+    **Parameters:**
+    - start_date: Start date (YYYY-MM-DD format), defaults to 30 days ago
+    - end_date: End date (YYYY-MM-DD format), defaults to today
+    - district: Filter by specific district
+    - format: csv (with a header row) or ndjson
+    
+    Streamed from a server-side cursor, so memory use is constant.
+    """
+    try:
+        end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.now()
+        start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else end - timedelta(days=30)
+        if format not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported format: {format}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = f"analytics_{start:%Y%m%d}_{end:%Y%m%d}.{format}"
+    return StreamingResponse(
+        stream_export(
+            analytics_export_statement(start, end, district), format, async_read_session_factory(request)
+        ),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters and size of the analytics result cache."""
+    return analytics_cache.snapshot_stats()
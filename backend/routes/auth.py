@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-from datetime import datetime, timedelta
 import os
-from Database.database import SessionLocal, DatabaseManager
+from Database.async_database import get_async_db, AsyncDatabaseManager
+from Database.otp_store import otp_store, OTP_TTL_SECONDS
+from Database.user_cache import user_cache, user_profile
+from routes.rate_limit import enforce_rate_limit
+from routes.tokens import issue_token, verify_token, InvalidToken
 
 router = APIRouter()
 
@@ -30,92 +33,75 @@ class OTPVerifyRequest(BaseModel):
     complaint_id: str
     otp_code: str
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/login", response_model=LoginResponse)
-async def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, http_request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     User login endpoint.
     For demo: accepts any valid phone number.
     In production: verify password/OTP here.
     """
+    enforce_rate_limit("login", http_request, request.phone_number)
     try:
-        # Check if user exists or create
-        user = DatabaseManager.create_or_get_user(
-            db,
-            {
-                "phone_number": request.phone_number,
-                "role": request.role,
-                "full_name": f"{request.role.title()} User"
-            }
-        )
+        # Known users are served from the cache; otherwise check if user exists or create
+        profile = user_cache.get_by_phone(request.phone_number)
+        if profile is None:
+            user = await AsyncDatabaseManager.create_or_get_user(
+                db,
+                {
+                    "phone_number": request.phone_number,
+                    "role": request.role,
+                    "full_name": f"{request.role.title()} User"
+                }
+            )
+            profile = user_profile(user)
+            user_cache.put(profile)
         
-        # Demo: generate simple token (use JWT in production)
-        token = f"token_{user.id}_{int(datetime.utcnow().timestamp())}"
+        token = issue_token({"uid": profile["id"], "role": profile["role"]})
         
         return LoginResponse(
             access_token=token,
             token_type="bearer",
-            user={
-                "id": user.id,
-                "phone_number": user.phone_number,
-                "role": user.role,
-                "full_name": user.full_name
-            },
+            user=profile,
             role=request.role
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/request-otp")
-async def request_otp(request: OTPRequest, db: Session = Depends(get_db)):
+async def request_otp(request: OTPRequest, http_request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Request OTP for victim complaint access.
     In production: send SMS with OTP.
     """
+    enforce_rate_limit("request_otp", http_request, request.phone_number)
     try:
-        from Database.schema import OTP
         import random
         import string
         
         # Generate random OTP
         otp_code = ''.join(random.choices(string.digits, k=6))
         
-        # Create OTP record
-        otp = OTP(
-            phone_number=request.phone_number,
-            complaint_id=request.complaint_id,
-            otp_code=otp_code,
-            expires_at=datetime.utcnow() + timedelta(minutes=5),
-            is_verified=False
-        )
-        db.add(otp)
-        db.commit()
+        # Store it, replacing any earlier OTP for this phone and complaint
+        await otp_store.issue(db, request.phone_number, request.complaint_id, otp_code)
         
         # TODO: Send OTP via SMS
         # sms_service.send(request.phone_number, f"Your OTP is: {otp_code}")
         
         return {
             "message": "OTP sent to your phone",
-            "expires_in": 300,  # 5 minutes in seconds
+            "expires_in": OTP_TTL_SECONDS,
             "phone": request.phone_number[-2:] + "****" + request.phone_number[-2:] if len(request.phone_number) > 4 else "****"
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/verify-otp")
-async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
+async def verify_otp(request: OTPVerifyRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Verify OTP for complaint access.
     """
     try:
-        is_valid = DatabaseManager.verify_otp(
+        is_valid = await otp_store.verify(
             db,
             request.phone_number,
             request.complaint_id,
@@ -129,48 +115,59 @@ async def verify_otp(request: OTPVerifyRequest, db: Session = Depends(get_db)):
             )
         
         # Generate token
-        token = f"victim_token_{request.complaint_id}_{int(datetime.utcnow().timestamp())}"
+        token = issue_token({
+            "sub": "victim",
+            "role": "victim",
+            "phone_number": request.phone_number,
+            "complaint_id": request.complaint_id
+        })
         
         return {
             "access_token": token,
             "token_type": "bearer",
             "complaint_id": request.complaint_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/logout")
 async def logout(token: str = None):
     """
-    Logout endpoint (invalidates token).
-    In production: add token to blacklist.
+    Logout endpoint.
+    Tokens are stateless: the client discards its token, which stops
+    verifying after ACCESS_TOKEN_EXPIRE_MINUTES.
     """
     return {"message": "Logged out successfully"}
 
 @router.get("/me")
-async def get_current_user(token: str = None, db: Session = Depends(get_db)):
+async def get_current_user(http_request: Request, token: str = None, db: AsyncSession = Depends(get_async_db)):
     """
-    Get current user info from token.
+    Get current user info from token (query parameter or Authorization: Bearer).
+    The token is verified without a database round trip and the profile comes
+    from the user cache when possible.
     """
+    authorization = http_request.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
     
-    # Demo: extract user_id from token (use JWT decode in production)
     try:
-        user_id = int(token.split('_')[1])
+        user_id = int(verify_token(token)["uid"])
+    except (InvalidToken, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    profile = user_cache.get(user_id)
+    if profile is None:
         from Database.schema import User
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        
-        return {
-            "id": user.id,
-            "phone_number": user.phone_number,
-            "role": user.role,
-            "full_name": user.full_name
-        }
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        profile = user_profile(user)
+        user_cache.put(profile)
+    return profile
@@ -1,13 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from Database.database import SessionLocal, DatabaseManager
+from tempfile import SpooledTemporaryFile
+import io
+import os
+from Database.database import SessionLocal
+from Database.async_database import get_async_db, AsyncDatabaseManager
+from Database.read_your_writes import get_async_read_db, async_read_session_factory
 from Database.schema import Complaint
+from Database.pagination import keyset_page, split_page
+from Database.rollups import apply_complaint_change, snapshot
+from Database.ingest import PARSERS, ingest_stream
+from Database.export import MEDIA_TYPES, complaint_filter_statement, complaint_export_statement, stream_export
+from Database.query_budget import query_budget
+from routes.rate_limit import enforce_rate_limit
 
 router = APIRouter()
 
+# Largest /bulk upload accepted; bigger feeds go through python -m Database.ingest
+BULK_UPLOAD_MAX_BYTES = int(os.getenv("BULK_UPLOAD_MAX_BYTES", 256 * 1024 * 1024))
+
 # Pydantic models
 class ComplaintCreate(BaseModel):
     victim_phone: str
@@ -15,6 +32,7 @@ class ComplaintCreate(BaseModel):
     fraud_type: str
     amount_lost: float
     accused_account: Optional[str] = None
+    accused_upi: Optional[str] = None
     accused_bank: Optional[str] = None
     transaction_id: Optional[str] = None
     transaction_date: Optional[datetime] = None
@@ -53,16 +71,9 @@ class ContactOfficerResponse(BaseModel):
     ticket_id: Optional[str] = None
     officer_contact: Optional[str] = None
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/", response_model=ComplaintResponse)
-async def create_complaint(complaint: ComplaintCreate, db: Session = Depends(get_db)):
+@query_budget(8)
+async def create_complaint(complaint: ComplaintCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new cyber fraud complaint.
     
@@ -74,42 +85,46 @@ async def create_complaint(complaint: ComplaintCreate, db: Session = Depends(get
     - district: District name
     - description: Detailed description of the incident
     """
+    enforce_rate_limit("create_complaint", request, complaint.victim_phone)
     try:
         from Database.schema import FraudType, CaseStatus, User
         from uuid import uuid4
         
-        # Create user if doesn't exist
-        user = DatabaseManager.create_or_get_user(
-            db,
-            {
-                "phone_number": complaint.victim_phone,
-                "full_name": complaint.victim_name,
-                "role": "victim"
-            }
-        )
-        
-        # Generate unique complaint ID
-        complaint_id = f"CF{datetime.utcnow().year}{str(uuid4()).replace('-', '')[:10].upper()}"
-        
-        # Create complaint
-        new_complaint = Complaint(
-            complaint_id=complaint_id,
-            victim_id=user.id,
-            fraud_type=FraudType[complaint.fraud_type],
-            amount_lost=complaint.amount_lost,
-            accused_account=complaint.accused_account,
-            accused_bank=complaint.accused_bank,
-            transaction_id=complaint.transaction_id,
-            transaction_date=complaint.transaction_date or datetime.utcnow(),
-            district=complaint.district,
-            description=complaint.description,
-            status=CaseStatus.PENDING,
-            reported_at=datetime.utcnow()
-        )
-        
-        db.add(new_complaint)
-        db.commit()
-        db.refresh(new_complaint)
+        # Victim, complaint and rollup delta commit together as one transaction
+        async with AsyncDatabaseManager.unit_of_work(db):
+            # Create user if doesn't exist
+            user = await AsyncDatabaseManager.create_or_get_user(
+                db,
+                {
+                    "phone_number": complaint.victim_phone,
+                    "full_name": complaint.victim_name,
+                    "role": "victim"
+                }
+            )
+            
+            # Generate unique complaint ID
+            complaint_id = f"CF{datetime.utcnow().year}{str(uuid4()).replace('-', '')[:10].upper()}"
+            
+            # Create complaint
+            new_complaint = Complaint(
+                complaint_id=complaint_id,
+                victim_id=user.id,
+                fraud_type=FraudType[complaint.fraud_type],
+                amount_lost=complaint.amount_lost,
+                accused_account=complaint.accused_account,
+                accused_upi=complaint.accused_upi,
+                accused_bank=complaint.accused_bank,
+                transaction_id=complaint.transaction_id,
+                transaction_date=complaint.transaction_date or datetime.utcnow(),
+                district=complaint.district,
+                description=complaint.description,
+                status=CaseStatus.PENDING,
+                reported_at=datetime.utcnow()
+            )
+            
+            db.add(new_complaint)
+            await db.flush()  # assigns new_complaint.id
+            await db.run_sync(apply_complaint_change, None, snapshot(new_complaint))
         
         return ComplaintResponse(
             id=new_complaint.id,
@@ -125,11 +140,96 @@ async def create_complaint(complaint: ComplaintCreate, db: Session = Depends(get
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk")
+async def bulk_ingest_complaints(
+    request: Request,
+    format: Optional[str] = Query(None, description="ndjson or csv (default: from Content-Type)"),
+    chunk_size: int = Query(1000, ge=1, le=5000, description="Records per transaction")
+):
+    """
+    Bulk-load complaints from a 1930/CFCFRMS feed.
+    
+    The request body is NDJSON (one complaint per line, same fields as
+    POST /api/complaints plus optional complaint_id, accused_upi and
+    victim_account) or CSV with a header row. Records are written in chunks
+    of chunk_size, one transaction each; invalid rows are reported by line
+    number and skipped. Bodies over BULK_UPLOAD_MAX_BYTES are rejected with 413.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if fmt not in PARSERS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}")
+    too_large = HTTPException(status_code=413, detail=f"Upload exceeds {BULK_UPLOAD_MAX_BYTES} bytes")
+    try:
+        declared = int(request.headers.get("content-length", 0))
+    except ValueError:
+        declared = 0
+    if declared > BULK_UPLOAD_MAX_BYTES:
+        raise too_large
+    
+    # Spool the upload (to disk past 16 MB) while it arrives, then parse it
+    # incrementally on a worker thread with a synchronous session. Chunked
+    # uploads carry no Content-Length, so the cap is also checked as it arrives
+    body = SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    try:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > BULK_UPLOAD_MAX_BYTES:
+                raise too_large
+            body.write(chunk)
+        body.seek(0)
+        stream = io.TextIOWrapper(body, encoding="utf-8", newline="")
+        
+        def run():
+            db = SessionLocal()
+            try:
+                return ingest_stream(db, stream, fmt, chunk_size)
+            finally:
+                db.close()
+        
+        return await run_in_threadpool(run)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        body.close()
+
+@router.get("/export")
+async def export_complaints(
+    request: Request,
+    status: Optional[str] = None,
+    district: Optional[str] = None,
+    format: str = Query("csv", description="csv or ndjson")
+):
+    """
+    Download every complaint matching the list filters, newest first.
+    
+    Streamed from a server-side cursor as CSV (with a header row) or NDJSON,
+    so exports of any size use constant memory on both ends.
+    """
+    try:
+        statement = complaint_export_statement(status, district)
+        if format not in MEDIA_TYPES:
+            raise ValueError(f"Unsupported format: {format}")
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown status: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = f"complaints_{datetime.utcnow():%Y%m%d_%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_export(statement, format, async_read_session_factory(request)),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/{complaint_id}", response_model=ComplaintResponse)
-async def get_complaint(complaint_id: str, db: Session = Depends(get_db)):
+@query_budget(1)
+async def get_complaint(complaint_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get complaint details by complaint ID."""
     try:
-        complaint = DatabaseManager.get_complaint_by_id(db, complaint_id)
+        complaint = await AsyncDatabaseManager.get_complaint_by_id(db, complaint_id)
         if not complaint:
             raise HTTPException(status_code=404, detail="Complaint not found")
         
@@ -150,39 +250,44 @@ async def get_complaint(complaint_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/")
+@query_budget(2)
 async def list_complaints(
     status: Optional[str] = None,
     district: Optional[str] = None,
     limit: int = Query(50, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(True, description="Count all matching complaints (false skips the COUNT)"),
+    offset: int = Query(0, ge=0, description="Deprecated - use cursor"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
-    List complaints with optional filtering.
+    List complaints with optional filtering, newest first.
     
     **Parameters:**
     - status: Filter by status (PENDING, ASSIGNED, FIR_REGISTERED, etc.)
     - district: Filter by district
     - limit: Number of results (default 50, max 500)
-    - offset: Pagination offset
+    - cursor: Opaque cursor returned as next_cursor; omit for the first page
+    - include_total: Count all matches (default); pass false to skip the COUNT, total is then null
+    - offset: Legacy offset pagination, ignored when cursor is given
     """
     try:
-        query = db.query(Complaint)
+        query = complaint_filter_statement(status, district)
         
-        if status:
-            from Database.schema import CaseStatus
-            query = query.filter(Complaint.status == CaseStatus[status])
-        
-        if district:
-            query = query.filter(Complaint.district == district)
+        total = None
+        if include_total:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
         
-        total = query.count()
-        complaints = query.offset(offset).limit(limit).all()
+        page = keyset_page(query, Complaint, cursor, limit)
+        if offset and not cursor:
+            page = page.offset(offset)
+        complaints, next_cursor = split_page((await db.scalars(page)).all(), limit)
         
         return {
             "total": total,
             "limit": limit,
             "offset": offset,
+            "next_cursor": next_cursor,
             "complaints": [
                 {
                     "id": c.id,
@@ -200,10 +305,11 @@ async def list_complaints(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.patch("/{complaint_id}", response_model=ComplaintResponse)
+@query_budget(4)
 async def update_complaint(
     complaint_id: str,
     update: ComplaintUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update complaint status or details.
@@ -214,10 +320,12 @@ async def update_complaint(
     - amount_recovered: Amount recovered (if any)
     """
     try:
-        complaint = DatabaseManager.get_complaint_by_id(db, complaint_id)
+        complaint = await AsyncDatabaseManager.get_complaint_by_id(db, complaint_id)
         if not complaint:
             raise HTTPException(status_code=404, detail="Complaint not found")
         
+        before = snapshot(complaint)
+        
         if update.status:
             from Database.schema import CaseStatus
             complaint.status = CaseStatus[update.status]
@@ -228,8 +336,8 @@ async def update_complaint(
         if update.amount_recovered is not None:
             complaint.amount_recovered = update.amount_recovered
         
-        db.commit()
-        db.refresh(complaint)
+        await db.run_sync(apply_complaint_change, before, snapshot(complaint))
+        await db.commit()
         
         return ComplaintResponse(
             id=complaint.id,
@@ -248,19 +356,14 @@ async def update_complaint(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{complaint_id}/activity")
-async def get_complaint_activity(complaint_id: str, db: Session = Depends(get_db)):
+@query_budget(2)
+async def get_complaint_activity(complaint_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get activity log for a complaint."""
     try:
-        from Database.schema import CaseActivity
-        
-        complaint = DatabaseManager.get_complaint_by_id(db, complaint_id)
+        complaint = await AsyncDatabaseManager.get_complaint_by_id(db, complaint_id, with_activities=True)
         if not complaint:
             raise HTTPException(status_code=404, detail="Complaint not found")
         
-        activities = db.query(CaseActivity).filter(
-            CaseActivity.complaint_id == complaint.id
-        ).order_by(CaseActivity.created_at.desc()).all()
-        
         return {
             "complaint_id": complaint_id,
             "activities": [
@@ -270,9 +373,9 @@ async def get_complaint_activity(complaint_id: str, db: Session = Depends(get_db
                     "description": a.description,
                     "remarks": a.remarks,
                     "created_at": a.created_at,
-                    "created_by": a.created_by
+                    "created_by": a.user_id
                 }
-                for a in activities
+                for a in complaint.activities
             ]
         }
     except HTTPException:
@@ -284,7 +387,7 @@ async def get_complaint_activity(complaint_id: str, db: Session = Depends(get_db
 async def contact_investigating_officer(
     complaint_id: str,
     contact_request: ContactOfficerRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Contact the investigating officer for a complaint.
@@ -307,7 +410,7 @@ async def contact_investigating_officer(
     """
     try:
         # Verify complaint exists
-        complaint = DatabaseManager.get_complaint_by_id(db, complaint_id)
+        complaint = await AsyncDatabaseManager.get_complaint_by_id(db, complaint_id)
         if not complaint:
             raise HTTPException(status_code=404, detail="Complaint not found")
         
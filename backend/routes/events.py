@@ -0,0 +1,69 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import asyncio
+import json
+import os
+
+from Database.change_feed import change_feed, FREEZE_QUEUE
+
+router = APIRouter()
+
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", 15))
+
+
+def _sse(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@router.get("/stream")
+async def stream_events(
+    complaint_id: Optional[List[str]] = Query(None, description="Complaint ids to follow"),
+    district: Optional[List[str]] = Query(None, description="Districts to follow"),
+    freeze_queue: bool = Query(False, description="Follow bank freeze requests and outcomes")
+):
+    """
+    Server-sent events for complaint, bank action and activity changes.
+
+    Subscribe with any mix of ?complaint_id=...&district=...&freeze_queue=true
+    and listen with EventSource. Event names are complaint.created,
+    complaint.updated, bank_action.created, bank_action.updated,
+    activity.created and resync (the client fell behind and should refetch).
+    A comment line is sent every EVENTS_KEEPALIVE_SECONDS to keep idle
+    connections open. Connections hold no database session.
+    """
+    topics = [f"complaint:{c}" for c in complaint_id or []]
+    topics += [f"district:{d}" for d in district or []]
+    if freeze_queue:
+        topics.append(FREEZE_QUEUE)
+    if not topics:
+        raise HTTPException(status_code=400, detail="Subscribe to at least one complaint_id, district or freeze_queue")
+
+    subscriber = change_feed.subscribe(topics)
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many event stream connections", headers={"Retry-After": "30"})
+
+    async def events():
+        try:
+            yield f"retry: 5000\n: subscribed to {', '.join(topics)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event)
+        finally:
+            change_feed.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats")
+async def get_event_stats():
+    """Open connections, topics and delivery counters for this worker"""
+    return change_feed.snapshot_stats()
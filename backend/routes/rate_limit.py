@@ -0,0 +1,199 @@
+"""
+Token-bucket rate limiting for the auth and complaint-filing endpoints.
+
+Each route has one bucket per client IP and one per phone number. A bucket
+holds up to N tokens, refills at N per period and each request takes one;
+an empty bucket answers 429 with Retry-After. Limits are "N/second",
+"N/minute" or "N/hour" strings, configurable per route and key type:
+
+    RATE_LIMIT_REQUEST_OTP_PHONE=3/minute
+    RATE_LIMIT_REQUEST_OTP_IP=20/minute
+
+Buckets live in process memory (LocalBucketStore, LRU-bounded by
+RATE_LIMIT_MAX_KEYS). With several workers set RATE_LIMIT_STORE=redis and
+RATE_LIMIT_REDIS_URL so they share buckets; if redis is not installed or
+unreachable the local store stands in.
+"""
+from fastapi import HTTPException, Request
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+import math
+import os
+import re
+import time
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "local").lower()
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+# Only behind a trusted proxy: take the client IP from X-Forwarded-For
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+
+# route -> key type -> default limit
+DEFAULT_LIMITS = {
+    "request_otp": {"phone": "3/minute", "ip": "20/minute"},
+    "login": {"phone": "5/minute", "ip": "30/minute"},
+    "create_complaint": {"phone": "5/hour", "ip": "30/hour"},
+}
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def parse_limit(limit: str) -> Tuple[float, float]:
+    """'5/minute' -> (capacity 5, refill rate 5/60 tokens per second)"""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(second|minute|hour)s?\s*", limit)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {limit!r} (expected e.g. '5/minute')")
+    capacity = float(match.group(1))
+    return capacity, capacity / PERIODS[match.group(2)]
+
+
+class LocalBucketStore:
+    """Token buckets in this process, evicting the least recently used beyond max_keys"""
+
+    name = "local"
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def take(self, key: str, capacity: float, rate: float) -> Tuple[bool, float]:
+        """Take one token. Returns (allowed, seconds until a token is available)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                # An evicted bucket restarts full, the same as an idle one
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RedisBucketStore:
+    """
+    Buckets shared by every worker through Redis. The refill-and-take runs
+    as one Lua script on Redis' clock; idle buckets expire on their own.
+    Falls back to the local store while Redis is unreachable.
+    """
+
+    name = "redis"
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local retry = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        retry = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return {allowed, tostring(retry)}
+    """
+
+    def __init__(self, client, fallback: Optional[LocalBucketStore] = None):
+        self.client = client
+        self.fallback = fallback or LocalBucketStore()
+        self._take = client.register_script(self.SCRIPT)
+        self._warned = False
+
+    def take(self, key: str, capacity: float, rate: float) -> Tuple[bool, float]:
+        try:
+            allowed, retry = self._take(keys=[f"ratelimit:{key}"], args=[capacity, rate])
+        except Exception as e:
+            if not self._warned:
+                print(f"Rate limit store unavailable, using local buckets: {e}")
+                self._warned = True
+            return self.fallback.take(key, capacity, rate)
+        self._warned = False
+        return bool(int(allowed)), float(retry)
+
+
+def store_from_env():
+    if RATE_LIMIT_STORE == "redis":
+        try:
+            import redis
+        except ImportError:
+            print("RATE_LIMIT_STORE=redis but the redis package is not installed; using local buckets")
+            return LocalBucketStore()
+        return RedisBucketStore(redis.Redis.from_url(RATE_LIMIT_REDIS_URL, socket_timeout=0.5))
+    return LocalBucketStore()
+
+
+class RateLimiter:
+    """Per-route limits over a bucket store"""
+
+    def __init__(self, store=None, limits: Optional[Dict[str, Dict[str, str]]] = None):
+        self.store = store or LocalBucketStore()
+        self.limits = {
+            route: {key_type: parse_limit(limit) for key_type, limit in by_key.items()}
+            for route, by_key in (limits or DEFAULT_LIMITS).items()
+        }
+
+    def check(self, route: str, **keys: Optional[str]) -> float:
+        """
+        Take a token from each of the route's buckets for the given keys
+        (e.g. ip=..., phone=...). Returns 0 if allowed, otherwise the
+        seconds to wait before retrying.
+        """
+        for key_type, value in keys.items():
+            limit = self.limits.get(route, {}).get(key_type)
+            if limit is None or not value:
+                continue
+            allowed, retry_after = self.store.take(f"{route}:{key_type}:{value}", *limit)
+            if not allowed:
+                return retry_after
+        return 0.0
+
+
+def limits_from_env() -> Dict[str, Dict[str, str]]:
+    return {
+        route: {
+            key_type: os.getenv(f"RATE_LIMIT_{route.upper()}_{key_type.upper()}", default)
+            for key_type, default in by_key.items()
+        }
+        for route, by_key in DEFAULT_LIMITS.items()
+    }
+
+
+rate_limiter = RateLimiter(store_from_env(), limits_from_env())
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def enforce_rate_limit(route: str, request: Request, phone_number: Optional[str] = None):
+    """Raise a 429 with Retry-After if the client IP or phone number is over the route's limit"""
+    if not RATE_LIMIT_ENABLED:
+        return
+    phone = re.sub(r"\D", "", phone_number or "")
+    retry_after = rate_limiter.check(route, ip=client_ip(request), phone=phone)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
@@ -0,0 +1,69 @@
+"""
+Stateless signed access tokens.
+
+A token is base64url(JSON claims) + "." + base64url(HMAC-SHA256 signature)
+keyed with SECRET_KEY. The claims carry the user id, role and expiry, so a
+token is verified without touching the database:
+
+    {"uid": 42, "role": "police", "exp": 1718000000}
+    {"sub": "victim", "role": "victim", "complaint_id": "CF...", "exp": ...}
+
+Tokens cannot be revoked before they expire (ACCESS_TOKEN_EXPIRE_MINUTES).
+"""
+from typing import Dict, Optional
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+if not SECRET_KEY:
+    # Tokens from this key only verify in this process and die with it
+    print("SECRET_KEY is not set; using a random per-process signing key")
+    SECRET_KEY = secrets.token_urlsafe(32)
+
+
+class InvalidToken(ValueError):
+    """Raised for malformed, tampered or expired tokens"""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str, key: str) -> str:
+    return _b64encode(hmac.new(key.encode(), payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(claims: Dict, expires_in_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES,
+                key: Optional[str] = None) -> str:
+    """Sign claims (plus an exp timestamp) into a token"""
+    body = {**claims, "exp": int(time.time()) + expires_in_minutes * 60}
+    payload = _b64encode(json.dumps(body, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload, key or SECRET_KEY)}"
+
+
+def verify_token(token: str, key: Optional[str] = None) -> Dict:
+    """Return the token's claims, or raise InvalidToken"""
+    try:
+        payload, signature = token.split(".")
+    except (AttributeError, ValueError):
+        raise InvalidToken("Malformed token")
+    if not hmac.compare_digest(signature, _sign(payload, key or SECRET_KEY)):
+        raise InvalidToken("Bad signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise InvalidToken("Malformed token")
+    if not isinstance(claims, dict) or claims.get("exp", 0) < time.time():
+        raise InvalidToken("Token expired")
+    return claims
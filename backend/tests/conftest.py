@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# Point the app at a throwaway SQLite file before any Database module is imported
+_db_dir = tempfile.mkdtemp(prefix="scamshield-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from Database.database import init_db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_db()
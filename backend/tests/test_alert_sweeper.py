@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from Database.database import SessionLocal, DatabaseManager
+from Database.schema import CaseStatus, Complaint, FraudType, User
+
+
+def _file_complaint(db, complaint_id: str) -> Complaint:
+    victim = User(phone_number=f"92{abs(hash(complaint_id)) % 10**8:08d}", full_name="Sweeper Test")
+    db.add(victim)
+    db.flush()
+    complaint = Complaint(
+        complaint_id=complaint_id, victim_id=victim.id, fraud_type=FraudType.UPI_SCAM,
+        amount_lost=1000, district="Sweeper", transaction_date=datetime.utcnow() - timedelta(minutes=5)
+    )
+    db.add(complaint)
+    db.commit()
+    return complaint
+
+
+def _claimed_ids(db, lease_minutes: float = 10):
+    since = datetime.utcnow() - timedelta(hours=1)
+    return [row[0] for row in DatabaseManager.claim_unalerted_complaints(db, since, 100, lease_minutes)]
+
+
+def test_claim_is_a_lease_until_alerts_are_triggered():
+    db = SessionLocal()
+    try:
+        complaint = _file_complaint(db, "SWEEP-LEASE-1")
+        assert "SWEEP-LEASE-1" in _claimed_ids(db)
+        # Held by the lease
+        assert "SWEEP-LEASE-1" not in _claimed_ids(db)
+        db.refresh(complaint)
+        assert complaint.alerts_triggered_at is None
+        # The job never ran: an expired lease is claimed again
+        assert "SWEEP-LEASE-1" in _claimed_ids(db, lease_minutes=-1)
+
+        complaint.alerts_triggered_at = datetime.utcnow()
+        db.commit()
+        assert "SWEEP-LEASE-1" not in _claimed_ids(db, lease_minutes=-1)
+    finally:
+        db.close()
+
+
+def test_expired_lease_is_not_reclaimed_once_complaint_leaves_pending():
+    db = SessionLocal()
+    try:
+        complaint = _file_complaint(db, "SWEEP-STATUS-1")
+        assert "SWEEP-STATUS-1" in _claimed_ids(db)
+        complaint.status = CaseStatus.IN_PROCESS
+        db.commit()
+        assert "SWEEP-STATUS-1" not in _claimed_ids(db, lease_minutes=-1)
+    finally:
+        db.close()
@@ -0,0 +1,71 @@
+import asyncio
+
+from Database.change_feed import LocalBroker, _bank_action_event, change_feed
+from Database.database import SessionLocal
+from Database.schema import ActionType, BankAction, CaseActivity, Complaint, FraudType, User
+
+
+class RecordingBroker(LocalBroker):
+    def __init__(self):
+        self.published = []
+
+    def publish(self, events, deliver):
+        self.published.append([event["type"] for event in events])
+        super().publish(events, deliver)
+
+
+def _file_complaint_with_failed_step(broker: RecordingBroker):
+    """Complaint and one activity commit; a second activity's savepoint rolls back"""
+    db = SessionLocal()
+    try:
+        victim = User(phone_number="9500000001", full_name="Feed Test")
+        db.add(victim)
+        db.flush()
+        complaint = Complaint(complaint_id="FEED-1", victim_id=victim.id, fraud_type=FraudType.UPI_SCAM,
+                              amount_lost=100, district="FeedTown")
+        db.add(complaint)
+        db.flush()
+        with db.begin_nested():
+            db.add(CaseActivity(complaint_id=complaint.id, action_type=ActionType.COMPLAINT_REGISTERED,
+                                description="kept"))
+        # A released savepoint is still part of the open transaction
+        assert broker.published == []
+        savepoint = db.begin_nested()
+        db.add(CaseActivity(complaint_id=complaint.id, action_type=ActionType.BANK_NOTIFIED, description="undone"))
+        db.flush()
+        savepoint.rollback()
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_events_are_published_on_commit_without_rolled_back_savepoints():
+    broker, broker_before = RecordingBroker(), change_feed.broker
+
+    async def run():
+        subscriber = change_feed.subscribe(["complaint:FEED-1"])
+        try:
+            await asyncio.to_thread(_file_complaint_with_failed_step, change_feed.broker)
+            events = [await asyncio.wait_for(subscriber.queue.get(), 2) for _ in range(2)]
+            await asyncio.sleep(0.1)
+            assert subscriber.queue.empty()
+            return events
+        finally:
+            change_feed.unsubscribe(subscriber)
+
+    try:
+        change_feed.broker = broker
+        events = asyncio.run(run())
+    finally:
+        change_feed.broker = broker_before
+    assert broker.published == [["complaint.created", "activity.created"]]
+    assert [event["description"] for event in events[1:]] == ["kept"]
+
+
+def test_bank_action_events_mask_the_account_number():
+    complaint = Complaint(complaint_id="FEED-2", district="FeedTown")
+    action = BankAction(id=7, bank_name="Test Bank", account_number="123456789012",
+                        action_type="FREEZE", status="PENDING", amount=500)
+    event = _bank_action_event(action, complaint, "created")
+    assert event["account"] == "9012****"
+    assert "123456789012" not in str(event)
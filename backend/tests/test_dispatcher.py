@@ -0,0 +1,38 @@
+import time
+
+from Alerts.dispatcher import ChannelDispatcher
+
+
+def _slow(seconds):
+    time.sleep(seconds)
+    return True
+
+
+def test_time_spent_queued_does_not_count_against_the_call():
+    dispatcher = ChannelDispatcher(channel_limits={"sms": 1}, call_timeout=0.5)
+    try:
+        # The second call waits ~0.3s behind the first, then runs well within its timeout
+        futures = [dispatcher.submit("sms", _slow, 0.3) for _ in range(2)]
+        assert dispatcher.wait(futures) == [True, True]
+    finally:
+        dispatcher.shutdown()
+
+
+def test_call_running_past_its_timeout_fails():
+    dispatcher = ChannelDispatcher(call_timeout=0.1)
+    try:
+        futures = [dispatcher.submit("email", _slow, 0.5), dispatcher.submit("email", _slow, 0)]
+        assert dispatcher.wait(futures) == [False, True]
+    finally:
+        dispatcher.shutdown()
+
+
+def test_cancelled_call_does_not_block_wait():
+    dispatcher = ChannelDispatcher(channel_limits={"i4c": 1}, call_timeout=1)
+    try:
+        running = dispatcher.submit("i4c", _slow, 0.2)
+        queued = dispatcher.submit("i4c", _slow, 0)
+        assert queued.cancel()
+        assert dispatcher.wait([running, queued]) == [True, False]
+    finally:
+        dispatcher.shutdown()
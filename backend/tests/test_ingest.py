@@ -0,0 +1,70 @@
+import io
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+import routes.complaints
+from Database.database import SessionLocal, DatabaseManager
+from Database.ingest import ingest_stream, normalize_record
+from Database.schema import Complaint
+from main import app
+
+RECORD = {
+    "victim_phone": "9100000001",
+    "victim_name": "Ingest Test",
+    "fraud_type": "UPI_SCAM",
+    "amount_lost": 5000,
+    "district": "Pune",
+    "description": "Test record",
+}
+
+
+def test_offset_transaction_date_is_stored_as_naive_utc():
+    record = normalize_record({**RECORD, "transaction_date": "2026-10-17T10:00:00+05:30"})
+    assert record["transaction_date"] == datetime(2026, 10, 17, 4, 30)
+    assert record["transaction_date"].tzinfo is None
+
+
+def test_zulu_and_naive_transaction_dates_are_unchanged():
+    assert normalize_record({**RECORD, "transaction_date": "2026-10-17T10:00:00Z"})["transaction_date"] == datetime(2026, 10, 17, 10, 0)
+    assert normalize_record({**RECORD, "transaction_date": "2026-10-17T10:00:00"})["transaction_date"] == datetime(2026, 10, 17, 10, 0)
+
+
+def test_ingested_offset_record_round_trips_as_utc():
+    feed = json.dumps({**RECORD, "complaint_id": "INGEST-TZ-1", "transaction_date": "2026-10-17T10:00:00+05:30"})
+    db = SessionLocal()
+    try:
+        result = ingest_stream(db, io.StringIO(feed + "\n"))
+        assert result["inserted"] == 1
+        stored = db.query(Complaint).filter(Complaint.complaint_id == "INGEST-TZ-1").one()
+        assert stored.transaction_date == datetime(2026, 10, 17, 4, 30)
+    finally:
+        db.close()
+
+
+def test_undated_records_are_not_claimed_by_the_alert_sweeper():
+    feed = json.dumps({**RECORD, "complaint_id": "INGEST-UNDATED-1"})
+    db = SessionLocal()
+    try:
+        assert ingest_stream(db, io.StringIO(feed + "\n"))["inserted"] == 1
+        stored = db.query(Complaint).filter(Complaint.complaint_id == "INGEST-UNDATED-1").one()
+        assert stored.transaction_date is None
+        claimed = DatabaseManager.claim_unalerted_complaints(db, datetime(2000, 1, 1), batch_size=1000)
+        assert "INGEST-UNDATED-1" not in [complaint_id for complaint_id, _, _ in claimed]
+    finally:
+        db.close()
+
+
+def test_bulk_upload_over_the_size_cap_is_rejected(monkeypatch):
+    monkeypatch.setattr(routes.complaints, "BULK_UPLOAD_MAX_BYTES", 100)
+    feed = (json.dumps({**RECORD, "complaint_id": "INGEST-BIG-1"}) + "\n").encode() * 2
+    client = TestClient(app)
+    assert client.post("/api/complaints/bulk", content=feed).status_code == 413
+    # Chunked: no Content-Length, caught while the body arrives
+    assert client.post("/api/complaints/bulk", content=iter([feed[:80], feed[80:]])).status_code == 413
+    db = SessionLocal()
+    try:
+        assert db.query(Complaint).filter(Complaint.complaint_id == "INGEST-BIG-1").count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from Alerts.mule_network import MuleNetwork, _Forest, link_keys, mule_network
+from Database.database import SessionLocal
+from Database.schema import Complaint, FraudType, User
+from routes.alerts import router
+
+
+def test_placeholder_identifiers_do_not_link():
+    assert link_keys("NA", "na@", "0") == []
+    assert link_keys("000000000000", None, "N/A") == []
+    assert link_keys("1234567890", "mule.one@upi", "TXN778899") == [
+        "account:1234567890", "upi:mule.one@upi", "txn:TXN778899"
+    ]
+
+
+def test_too_common_identifier_stops_linking():
+    forest = _Forest(max_uses=2)
+    for n in range(4):
+        forest.add(f"C{n}", ["account:GATEWAY001"], 100)
+    assert len(forest.members[forest.find("complaint:C0")]) == 2
+    assert len(forest.members[forest.find("complaint:C3")]) == 1
+
+
+def test_cluster_of_complaint_filed_through_another_worker():
+    app = FastAPI()
+    app.include_router(router, prefix="/api/alerts")
+    db = SessionLocal()
+    try:
+        mule_network.rebuild(db)
+        victim = User(phone_number="9400000001", full_name="Cluster Test")
+        db.add(victim)
+        db.commit()
+        # Committed elsewhere: this process' commit hooks never saw it
+        db.execute(insert(Complaint), [
+            {"complaint_id": f"MULE-OTHER-{n}", "victim_id": victim.id, "fraud_type": FraudType.UPI_SCAM,
+             "amount_lost": 100, "accused_upi": "shared.mule@ybl", "created_at": datetime.utcnow()}
+            for n in range(2)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    with TestClient(app) as client:
+        response = client.get("/api/alerts/MULE-OTHER-0/cluster")
+        assert response.status_code == 200
+        assert response.json()["cluster_size"] == 2
+        assert client.get("/api/alerts/MULE-MISSING/cluster").status_code == 404
+
+
+def test_catch_up_reads_only_past_the_high_water_mark():
+    network = MuleNetwork(sync_seconds=0)
+    db = SessionLocal()
+    try:
+        assert network.catch_up(db) > 0  # first use loads every complaint
+        assert network.catch_up(db) == 0
+        victim = User(phone_number="9400000002", full_name="High Water Test")
+        db.add(victim)
+        db.commit()
+        now = datetime.utcnow()
+        db.execute(insert(Complaint), [
+            {"complaint_id": "MULE-HW-NEW", "victim_id": victim.id, "fraud_type": FraudType.UPI_SCAM,
+             "amount_lost": 100, "accused_account": "4440001111", "created_at": now},
+            # Created before the mark but committed after it was read
+            {"complaint_id": "MULE-HW-LATE", "victim_id": victim.id, "fraud_type": FraudType.UPI_SCAM,
+             "amount_lost": 100, "accused_account": "4440001111", "created_at": now - timedelta(hours=1)},
+        ])
+        db.commit()
+        assert network.catch_up(db) == 1
+        assert network.contains("MULE-HW-NEW") and not network.contains("MULE-HW-LATE")
+        assert network.ensure(db, "MULE-HW-LATE")
+        assert network.cluster_size("MULE-HW-NEW") == 2
+        assert not network.ensure(db, "MULE-HW-MISSING")
+    finally:
+        db.close()
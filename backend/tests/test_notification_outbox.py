@@ -0,0 +1,42 @@
+from fastapi.testclient import TestClient
+
+from Alerts.dispatcher import ChannelDispatcher
+from Alerts.notification_worker import NotificationWorker
+from Database.database import SessionLocal, DatabaseManager
+from Database.schema import Complaint, FraudType, Notification, User
+from main import app
+
+
+def test_sent_notification_moves_to_delivered_on_receipt():
+    db = SessionLocal()
+    dispatcher = ChannelDispatcher()
+    try:
+        victim = User(phone_number="9600000001", full_name="Outbox Test")
+        db.add(victim)
+        db.commit()
+        complaint = Complaint(complaint_id="OUTBOX-1", victim_id=victim.id,
+                              fraud_type=FraudType.UPI_SCAM, amount_lost=100)
+        db.add(complaint)
+        db.commit()
+        notification = DatabaseManager.send_notification(db, {
+            "complaint_id": complaint.id, "notification_type": "SMS",
+            "recipient": victim.phone_number, "message": "Case registered"
+        })
+        assert notification.status == "PENDING"
+
+        assert NotificationWorker(batch_size=1000, dispatcher=dispatcher).run_once()["sent"] >= 1
+        db.rollback()  # end this session's read snapshot to see the worker's commit
+        assert db.get(Notification, notification.id).status == "SENT"
+
+        client = TestClient(app)
+        response = client.post(f"/api/alerts/notifications/{notification.id}/delivered")
+        assert response.status_code == 200, response.text
+        assert response.json()["status"] == "DELIVERED"
+        delivered_at = response.json()["delivered_at"]
+
+        # A repeated receipt keeps the first delivery time
+        assert client.post(f"/api/alerts/notifications/{notification.id}/delivered").json()["delivered_at"] == delivered_at
+        assert client.post("/api/alerts/notifications/999999/delivered").status_code == 404
+    finally:
+        dispatcher.shutdown()
+        db.close()
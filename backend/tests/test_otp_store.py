@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from Database.async_database import AsyncSessionLocal, async_engine
+from Database.database import SessionLocal
+from Database.otp_store import DatabaseOTPStore, MemoryOTPStore, OTPSweeper
+from Database.schema import OTP
+
+
+def _run(check):
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await check(db)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+def _rows(phone: str) -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count(OTP.id)).where(OTP.phone_number == phone))
+
+
+def test_database_otp_is_superseded_and_single_use():
+    store = DatabaseOTPStore()
+
+    async def check(db):
+        await store.issue(db, "9700000001", "CF-OTP-1", "111111")
+        await store.issue(db, "9700000001", "CF-OTP-1", "222222")
+        assert not await store.verify(db, "9700000001", "CF-OTP-1", "111111")
+        assert await store.verify(db, "9700000001", "CF-OTP-1", "222222")
+        assert not await store.verify(db, "9700000001", "CF-OTP-1", "222222")
+
+    _run(check)
+    assert _rows("9700000001") == 1
+
+
+def test_database_otp_expires():
+    store = DatabaseOTPStore()
+
+    async def check(db):
+        await store.issue(db, "9700000002", "CF-OTP-2", "333333", ttl_seconds=-1)
+        assert not await store.verify(db, "9700000002", "CF-OTP-2", "333333")
+
+    _run(check)
+
+
+def test_memory_otp_is_superseded_single_use_and_expires():
+    store = MemoryOTPStore()
+
+    async def check():
+        await store.issue(None, "9700000003", "CF-OTP-3", "111111")
+        await store.issue(None, "9700000003", "CF-OTP-3", "222222")
+        assert len(store) == 1
+        assert not await store.verify(None, "9700000003", "CF-OTP-3", "111111")
+        assert await store.verify(None, "9700000003", "CF-OTP-3", "222222")
+        assert not await store.verify(None, "9700000003", "CF-OTP-3", "222222")
+
+        await store.issue(None, "9700000003", "CF-OTP-4", "444444", ttl_seconds=-1)
+        assert not await store.verify(None, "9700000003", "CF-OTP-4", "444444")
+        assert len(store) == 0
+
+    asyncio.run(check())
+
+
+def test_memory_store_evicts_oldest_when_full_and_purges_expired():
+    store = MemoryOTPStore(max_entries=2)
+
+    async def check():
+        await store.issue(None, "9700000004", "CF-A", "111111")
+        await store.issue(None, "9700000004", "CF-B", "222222", ttl_seconds=-1)
+        await store.issue(None, "9700000004", "CF-C", "333333")
+        # Full: the expired entry is purged first, so the oldest live one survives
+        assert await store.verify(None, "9700000004", "CF-A", "111111")
+        await store.issue(None, "9700000004", "CF-D", "444444")
+        await store.issue(None, "9700000004", "CF-E", "555555")
+        assert len(store) == 2
+        assert not await store.verify(None, "9700000004", "CF-C", "333333")
+        await store.issue(None, "9700000004", "CF-F", "666666", ttl_seconds=-1)
+        assert store.purge_expired() == 1
+
+    asyncio.run(check())
+
+
+def test_sweeper_deletes_expired_rows_in_batches():
+    past, future = datetime.utcnow() - timedelta(minutes=1), datetime.utcnow() + timedelta(minutes=5)
+    with SessionLocal() as db:
+        db.add_all(
+            [OTP(phone_number="9700000005", complaint_id=f"CF-EXP-{n}", otp_code="000000", expires_at=past)
+             for n in range(5)]
+            + [OTP(phone_number="9700000005", complaint_id="CF-LIVE", otp_code="000000", expires_at=future)]
+        )
+        db.commit()
+
+    deleted = OTPSweeper(store=MemoryOTPStore(), batch_size=2).run_once()
+    assert deleted["database"] >= 5
+    assert _rows("9700000005") == 1
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from Alerts.pattern_counters import PatternCounterStore, pattern_counters
+from Database.database import SessionLocal
+from Database.query_budget import count_queries
+from Database.schema import Complaint, FraudType, User
+
+
+def _victim(db, phone):
+    victim = User(phone_number=phone, full_name="Pattern Test")
+    db.add(victim)
+    db.commit()
+    return victim
+
+
+def test_counter_lookup_issues_no_query_and_is_not_rechecked_by_default():
+    db = SessionLocal()
+    try:
+        victim = _victim(db, "9300000001")
+        complaint = Complaint(complaint_id="PATTERN-DEFAULT-1", victim_id=victim.id,
+                              fraud_type=FraudType.UPI_SCAM, amount_lost=100, accused_account="5550001111")
+        db.add(complaint)
+        db.commit()
+        db.refresh(complaint)
+        with count_queries() as counter:
+            pattern_counters.similar_cases(complaint)
+        assert counter[0] == 0
+        assert not pattern_counters.needs_confirmation
+        assert PatternCounterStore(confirm_in_database=True).needs_confirmation
+    finally:
+        db.close()
+
+
+def test_database_count_uses_the_counter_keys():
+    db = SessionLocal()
+    try:
+        victim = _victim(db, "9300000002")
+        accused = {"accused_account": "5550-0022-22", "accused_upi": "mule.two@okbank",
+                   "accused_bank": "State Bank"}
+        complaints = [
+            Complaint(complaint_id=f"PATTERN-KEYS-{n}", victim_id=victim.id, fraud_type=FraudType.UPI_SCAM,
+                      amount_lost=100, **accused)
+            for n in range(3)
+        ]
+        db.add_all(complaints)
+        db.commit()
+        assert pattern_counters.database_similar_cases(db, complaints[0]) == \
+            pattern_counters.similar_cases(complaints[0]) == {
+                "account:5550002222": 2,
+                "account_bank:5550002222@STATE BANK": 2,
+                "upi:mule.two@okbank": 2,
+            }
+    finally:
+        db.close()
+
+
+def test_database_count_finds_complaints_committed_elsewhere():
+    db = SessionLocal()
+    try:
+        victim = _victim(db, "9300000003")
+        # Filed through other workers: committed without this process' counters seeing them
+        db.execute(insert(Complaint), [
+            {"complaint_id": f"PATTERN-OTHER-{n}", "victim_id": victim.id, "fraud_type": FraudType.UPI_SCAM,
+             "amount_lost": 100, "accused_upi": "Mule.Three@OkBank", "created_at": datetime.utcnow()}
+            for n in range(2)
+        ])
+        db.commit()
+        complaint = Complaint(complaint_id="PATTERN-LOCAL-1", victim_id=victim.id, fraud_type=FraudType.UPI_SCAM,
+                              amount_lost=100, accused_upi="mule.three@okbank")
+        db.add(complaint)
+        db.commit()
+        assert pattern_counters.similar_cases(complaint) == {"upi:mule.three@okbank": 0}
+        assert pattern_counters.database_similar_cases(db, complaint) == {"upi:mule.three@okbank": 2}
+    finally:
+        db.close()
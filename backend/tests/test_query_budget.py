@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from Database.async_database import async_engine, async_read_engine
+from Database.database import SessionLocal
+from Database.query_budget import QueryBudgetMiddleware, count_queries
+from Database.schema import User
+from main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    yield TestClient(QueryBudgetMiddleware(app, mode="enforce"))
+    # No lifespan here, so close the aiosqlite connections main.py's shutdown would
+    asyncio.run(async_engine.dispose())
+    asyncio.run(async_read_engine.dispose())
+
+
+@pytest.fixture(scope="module")
+def complaint_id(client):
+    response = client.post("/api/complaints/", json={
+        "victim_phone": "9500000001",
+        "victim_name": "Budget Test",
+        "fraud_type": "UPI_SCAM",
+        "amount_lost": 25000,
+        "district": "Khordha",
+        "description": "Query budget test",
+        "accused_account": "123456789012",
+        "accused_upi": "budget@upi",
+        "accused_bank": "Test Bank",
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["complaint_id"]
+
+
+def test_transaction_control_is_not_counted():
+    db = SessionLocal()
+    try:
+        with count_queries() as counter:
+            db.execute(select(func.count(User.id))).scalar()
+            db.commit()
+        assert counter[0] == 1
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("path", [
+    "/api/complaints/{id}",
+    "/api/complaints/",
+    "/api/complaints/{id}/activity",
+    "/api/alerts/{id}/status",
+    "/api/analytics/summary",
+    "/api/analytics/by-status?status=PENDING",
+    "/api/analytics/priority-cases",
+    "/api/analytics/dashboard",
+])
+def test_read_routes_stay_within_budget(client, complaint_id, path):
+    response = client.get(path.format(id=complaint_id))
+    assert response.status_code == 200, response.text
+
+
+def test_write_routes_stay_within_budget(client, complaint_id):
+    response = client.patch(f"/api/complaints/{complaint_id}", json={"status": "IN_PROCESS"})
+    assert response.status_code == 200, response.text
+    response = client.post("/api/alerts/trigger", json={"complaint_id": complaint_id})
+    assert response.status_code == 200, response.text
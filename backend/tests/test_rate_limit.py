@@ -0,0 +1,73 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import routes.rate_limit as rate_limit
+from routes.rate_limit import LocalBucketStore, RateLimiter, parse_limit
+from main import app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake)
+    return fake
+
+
+def test_parse_limit():
+    assert parse_limit("5/minute") == (5.0, 5 / 60)
+    assert parse_limit(" 2 / seconds ") == (2.0, 2.0)
+    with pytest.raises(ValueError):
+        parse_limit("5 per minute")
+
+
+def test_bucket_empties_and_refills_over_time(clock):
+    store = LocalBucketStore()
+    capacity, rate = parse_limit("2/minute")
+    assert store.take("k", capacity, rate) == (True, 0.0)
+    assert store.take("k", capacity, rate) == (True, 0.0)
+    allowed, retry_after = store.take("k", capacity, rate)
+    assert not allowed and retry_after == pytest.approx(30)
+
+    clock.now += 29
+    assert not store.take("k", capacity, rate)[0]
+    clock.now += 31
+    assert store.take("k", capacity, rate)[0]
+    # Refill never exceeds the capacity
+    clock.now += 3600
+    assert [store.take("k", capacity, rate)[0] for _ in range(3)] == [True, True, False]
+
+
+def test_least_recently_used_bucket_is_evicted(clock):
+    store = LocalBucketStore(max_keys=2)
+    capacity, rate = parse_limit("1/hour")
+    store.take("a", capacity, rate)
+    store.take("b", capacity, rate)
+    store.take("a", capacity, rate)  # a is now the most recently used
+    store.take("c", capacity, rate)
+    assert len(store) == 2
+    # a kept its empty bucket; b was evicted and starts full again
+    assert not store.take("a", capacity, rate)[0]
+    assert store.take("b", capacity, rate)[0]
+
+
+def test_over_limit_request_gets_429_with_retry_after(monkeypatch):
+    limiter = RateLimiter(LocalBucketStore(), {"request_otp": {"phone": "2/minute", "ip": "100/minute"}})
+    monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    # Use up the phone's bucket (phone numbers are keyed by their digits)
+    assert limiter.check("request_otp", phone="9800000001") == 0
+    assert limiter.check("request_otp", phone="9800000001") == 0
+
+    response = TestClient(app).post("/api/auth/request-otp",
+                                    json={"phone_number": "98000 00001", "complaint_id": "CF-RATE-1"})
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 30
+    assert limiter.check("request_otp", phone="9800000002") == 0
@@ -0,0 +1,26 @@
+import pytest
+
+from routes.tokens import InvalidToken, issue_token, verify_token
+
+
+def test_token_round_trips_its_claims():
+    claims = verify_token(issue_token({"uid": 42, "role": "police"}))
+    assert claims["uid"] == 42 and claims["role"] == "police"
+
+
+def test_tampered_token_is_rejected():
+    payload, signature = issue_token({"uid": 42, "role": "victim"}).split(".")
+    forged = issue_token({"uid": 1, "role": "admin"}).split(".")[0]
+    with pytest.raises(InvalidToken):
+        verify_token(f"{forged}.{signature}")
+    with pytest.raises(InvalidToken):
+        verify_token(f"{payload}.{signature[:-2]}xx")
+    with pytest.raises(InvalidToken):
+        verify_token(issue_token({"uid": 42}, key="another-key"))
+    with pytest.raises(InvalidToken):
+        verify_token("not-a-token")
+
+
+def test_expired_token_is_rejected():
+    with pytest.raises(InvalidToken):
+        verify_token(issue_token({"uid": 42}, expires_in_minutes=-1))
@@ -0,0 +1,57 @@
+from sqlalchemy import func, select
+
+from Database.database import SessionLocal, DatabaseManager
+from Database.schema import User
+
+
+def _committed_users(phone: str) -> int:
+    """Count rows as another connection sees them (any dialect)"""
+    with SessionLocal() as other:
+        return other.scalar(select(func.count(User.id)).where(User.phone_number == phone))
+
+
+def test_savepoint_after_reads_is_not_committed_until_outer_commit():
+    db = SessionLocal()
+    try:
+        with DatabaseManager.unit_of_work(db):
+            db.execute(select(func.count(User.id))).scalar()
+            savepoint = db.begin_nested()
+            db.add(User(phone_number="9000000001", full_name="Savepoint Test"))
+            savepoint.commit()
+            assert _committed_users("9000000001") == 0
+        assert _committed_users("9000000001") == 1
+    finally:
+        db.close()
+
+
+def test_outer_rollback_undoes_released_savepoints():
+    db = SessionLocal()
+    try:
+        try:
+            with DatabaseManager.unit_of_work(db):
+                db.execute(select(func.count(User.id))).scalar()
+                with db.begin_nested():
+                    db.add(User(phone_number="9000000002", full_name="Rollback Test"))
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        assert _committed_users("9000000002") == 0
+    finally:
+        db.close()
+
+
+def test_async_savepoint_is_not_committed_until_outer_commit():
+    import asyncio
+    from Database.async_database import AsyncSessionLocal, AsyncDatabaseManager, async_engine
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            async with AsyncDatabaseManager.unit_of_work(db):
+                await db.execute(select(func.count(User.id)))
+                async with db.begin_nested():
+                    db.add(User(phone_number="9000000003", full_name="Async Savepoint Test"))
+                assert _committed_users("9000000003") == 0
+        await async_engine.dispose()
+
+    asyncio.run(run())
+    assert _committed_users("9000000003") == 1
@@ -0,0 +1,37 @@
+from Database.database import SessionLocal
+from Database.schema import User
+from Database.user_cache import UserCache, user_cache, user_profile
+
+
+def test_cache_evicts_least_recently_used():
+    cache = UserCache(max_entries=2)
+    for user_id in (1, 2):
+        cache.put({"id": user_id, "phone_number": f"90000000{user_id}", "role": "victim", "full_name": "x"})
+    assert cache.get(1) is not None
+    cache.put({"id": 3, "phone_number": "900000003", "role": "victim", "full_name": "x"})
+    assert cache.get(2) is None and cache.get_by_phone("900000002") is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+    assert cache.snapshot_stats()["evictions"] == 1
+
+
+def test_cached_user_is_invalidated_on_update_and_again_on_commit():
+    db = SessionLocal()
+    try:
+        user = User(phone_number="9900000001", full_name="Cache Test", role="victim")
+        db.add(user)
+        db.commit()
+        user_cache.put(user_profile(user))
+
+        user.full_name = "Renamed"
+        db.flush()
+        assert user_cache.get(user.id) is None
+        # A read racing the transaction re-caches the old profile...
+        user_cache.put({**user_profile(user), "full_name": "Cache Test"})
+        with db.begin_nested():
+            pass  # releasing a savepoint is not the commit
+        assert user_cache.get(user.id)["full_name"] == "Cache Test"
+        # ...which the commit drops again
+        db.commit()
+        assert user_cache.get(user.id) is None
+    finally:
+        db.close()
@@ -1,5 +1,6 @@
 import { useState } from 'react';
 import { Clock, AlertTriangle, CheckCircle, XCircle, Info } from 'lucide-react';
+import { useCaseEvents } from '@/services/useCaseEvents';
 
 export function FreezeQueue() {
   const [requests, setRequests] = useState([
@@ -53,6 +54,30 @@ export function FreezeQueue() {
     }
   ]);
 
+  // Freeze requests raised by the alert system arrive (and resolve) live
+  useCaseEvents({ freezeQueue: true }, (event) => {
+    if (event.action_type !== 'FREEZE' || event.bank_action_id === undefined) return;
+    const id = `BA${event.bank_action_id}`;
+    if (event.type === 'bank_action.created') {
+      setRequests((current) => current.some((req) => req.id === id) ? current : [{
+        id,
+        complaintId: event.complaint_id || '',
+        accountNumber: event.account || '',
+        accountHolder: 'Unknown',
+        amount: `₹${(event.amount || 0).toLocaleString('en-IN')}`,
+        requestedBy: 'Golden hour alert',
+        requestTime: new Date().toLocaleString('en-IN'),
+        priority: (event.amount || 0) >= 100000 ? 'critical' : 'high',
+        timeRemaining: '-',
+        status: 'pending'
+      }, ...current]);
+    } else if (event.type === 'bank_action.updated' && event.status !== 'PENDING') {
+      setRequests((current) => current.map((req) =>
+        req.id === id ? { ...req, status: event.status === 'SUCCESS' ? 'approved' : 'rejected' } : req
+      ));
+    }
+  });
+
   const getPriorityColor = (priority: string) => {
     const colors = {
       critical: 'border-red-500 bg-red-50',
@@ -7,6 +7,7 @@ import { ProgressStepper } from '../shared/ProgressStepper';
 import { ActivityTimeline } from '../shared/ActivityTimeline';
 import { ContactOfficerModal } from './ContactOfficerModal';
 import { useComplaints } from '@/services/useComplaints';
+import { useCaseEvents } from '@/services/useCaseEvents';
 import { useContactOfficer } from '@/services/useContactOfficer';
 import { exportAsText, generateComplaintReport, formatCurrency } from '@/services/exportService';
 
@@ -101,8 +102,14 @@ export function CaseDashboard({ complaintId, onLogout, onViewResources, isDarkMo
   const [emailEnabled, setEmailEnabled] = useState(true);
   const [downloadLoading, setDownloadLoading] = useState(false);
   const [contactModalOpen, setContactModalOpen] = useState(false);
+  const [updateCount, setUpdateCount] = useState(0);
 
-  // Fetch complaint data on mount or when complaintId changes
+  // Refetch when the complaint, its bank actions or its activity change
+  useCaseEvents({ complaintIds: complaintId ? [complaintId] : [] }, () => {
+    setUpdateCount((count) => count + 1);
+  });
+
+  // Fetch complaint data on mount, when complaintId changes and on updates
   useEffect(() => {
     const loadComplaint = async () => {
       try {
@@ -122,7 +129,7 @@ export function CaseDashboard({ complaintId, onLogout, onViewResources, isDarkMo
     if (complaintId) {
       loadComplaint();
     }
-  }, [complaintId]);
+  }, [complaintId, updateCount]);
 
   const handleDownloadReport = async () => {
     if (!caseData) return;
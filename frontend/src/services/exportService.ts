@@ -3,6 +3,8 @@
  * Provides functions for exporting data in various formats (CSV, PDF, JSON)
  */
 
+import { API_BASE_URL } from './apiClient';
+
 export interface ExportOptions {
   filename?: string;
   format?: 'csv' | 'pdf' | 'json';
@@ -78,6 +80,46 @@ export const downloadBlob = (blob: Blob, filename: string) => {
   URL.revokeObjectURL(url);
 };
 
+export interface ServerExportParams {
+  format?: 'csv' | 'ndjson';
+  [key: string]: string | undefined;
+}
+
+/**
+ * Download a streamed export straight from the API.
+ * The browser saves the response as it arrives, so large exports never
+ * sit in page memory or need paged round trips.
+ */
+export const downloadServerExport = (endpoint: string, params: ServerExportParams = {}) => {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value) query.append(key, value);
+  });
+
+  const link = document.createElement('a');
+  link.href = `${API_BASE_URL}${endpoint}?${query.toString()}`;
+  link.download = '';
+  document.body.appendChild(link);
+  link.click();
+  document.body.removeChild(link);
+};
+
+/**
+ * Export all complaints matching the list filters (server-side stream)
+ */
+export const exportComplaints = (
+  filters: { status?: string; district?: string } = {},
+  format: 'csv' | 'ndjson' = 'csv'
+) => downloadServerExport('/api/complaints/export', { ...filters, format });
+
+/**
+ * Export daily analytics rollups for a date window (server-side stream)
+ */
+export const exportAnalytics = (
+  filters: { start_date?: string; end_date?: string; district?: string } = {},
+  format: 'csv' | 'ndjson' = 'csv'
+) => downloadServerExport('/api/analytics/export', { ...filters, format });
+
 /**
  * Generate complaint report as formatted text
  */
@@ -36,4 +36,7 @@ export type {
   PriorityCasesResponse,
 } from './useAnalytics';
 
+export { useCaseEvents, subscribeToCaseEvents } from './useCaseEvents';
+export type { CaseEvent, CaseEventType, CaseEventSubscription } from './useCaseEvents';
+
 export { apiClient } from './apiClient';
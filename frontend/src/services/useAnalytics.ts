@@ -24,6 +24,7 @@ export interface CaseByStatus {
   total: number;
   limit: number;
   offset: number;
+  next_cursor: string | null;
   status: string;
   cases: Array<{
     complaint_id: string;
@@ -76,9 +77,22 @@ export interface PriorityCaseItem {
 }
 
 export interface PriorityCasesResponse {
-  total: number;
+  total: number | null;
   limit: number;
   offset: number;
+  next_cursor: string | null;
+  priority_cases: PriorityCaseItem[];
+}
+
+export interface DashboardAnalytics {
+  period: {
+    start_date: string;
+    end_date: string;
+    district: string;
+  };
+  summary: Omit<AnalyticsSummary, 'period'>;
+  fraud_types: FraudTypeStats[];
+  districts: DistrictStats[];
   priority_cases: PriorityCaseItem[];
 }
 
@@ -211,9 +225,42 @@ export const useAnalytics = () => {
     []
   );
 
+  const getDashboard = useCallback(
+    async (params?: {
+      startDate?: string;
+      endDate?: string;
+      district?: string;
+      priorityLimit?: number;
+    }) => {
+      setLoading(true);
+      setError(null);
+      try {
+        const queryParams = new URLSearchParams();
+        if (params?.startDate) queryParams.append('start_date', params.startDate);
+        if (params?.endDate) queryParams.append('end_date', params.endDate);
+        if (params?.district) queryParams.append('district', params.district);
+        if (params?.priorityLimit !== undefined) {
+          queryParams.append('priority_limit', params.priorityLimit.toString());
+        }
+
+        const endpoint = `/api/analytics/dashboard${queryParams.toString() ? `?${queryParams.toString()}` : ''}`;
+        const response = await apiClient.get<DashboardAnalytics>(endpoint);
+        return response;
+      } catch (err) {
+        const message = err instanceof Error ? err.message : 'Failed to fetch dashboard analytics';
+        setError(message);
+        throw err;
+      } finally {
+        setLoading(false);
+      }
+    },
+    []
+  );
+
   return {
     loading,
     error,
+    getDashboard,
     getAnalyticsSummary,
     getCasesByStatus,
     getFraudTypeStats,
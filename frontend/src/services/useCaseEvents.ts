@@ -0,0 +1,109 @@
+/**
+ * Case Events Service
+ * Server-sent events for complaint, bank action and activity changes,
+ * replacing dashboard polling
+ */
+
+import { useEffect, useRef } from 'react';
+import { API_BASE_URL } from './apiClient';
+
+export type CaseEventType =
+  | 'complaint.created'
+  | 'complaint.updated'
+  | 'bank_action.created'
+  | 'bank_action.updated'
+  | 'activity.created'
+  | 'resync';
+
+export interface CaseEvent {
+  id: number;
+  type: CaseEventType;
+  complaint_id?: string;
+  status?: string;
+  district?: string;
+  is_priority?: boolean;
+  is_funds_frozen?: boolean;
+  amount_recovered?: number;
+  bank_action_id?: number;
+  bank_name?: string;
+  account?: string; // masked: last 4 digits + '****'
+  action_type?: string;
+  amount?: number;
+  description?: string;
+  created_at?: string;
+  dropped?: number;
+}
+
+export interface CaseEventSubscription {
+  complaintIds?: string[];
+  districts?: string[];
+  freezeQueue?: boolean;
+}
+
+const EVENT_TYPES: CaseEventType[] = [
+  'complaint.created',
+  'complaint.updated',
+  'bank_action.created',
+  'bank_action.updated',
+  'activity.created',
+  'resync',
+];
+
+/**
+ * Open an event stream for the given complaints, districts and/or the
+ * freeze queue. Returns a function that closes it. The browser reconnects
+ * on its own after network errors; on 'resync' (the client fell behind)
+ * refetch whatever the view shows.
+ */
+export const subscribeToCaseEvents = (
+  subscription: CaseEventSubscription,
+  onEvent: (event: CaseEvent) => void
+): (() => void) => {
+  const query = new URLSearchParams();
+  subscription.complaintIds?.forEach((id) => query.append('complaint_id', id));
+  subscription.districts?.forEach((district) => query.append('district', district));
+  if (subscription.freezeQueue) query.append('freeze_queue', 'true');
+  if (!query.toString()) return () => {};
+
+  const source = new EventSource(`${API_BASE_URL}/api/events/stream?${query.toString()}`);
+  const handler = (message: MessageEvent) => {
+    try {
+      onEvent(JSON.parse(message.data) as CaseEvent);
+    } catch (err) {
+      console.warn('Ignoring malformed case event', err);
+    }
+  };
+  EVENT_TYPES.forEach((type) => source.addEventListener(type, handler as EventListener));
+
+  return () => source.close();
+};
+
+/**
+ * React hook: keep a subscription open while the component is mounted.
+ * The latest onEvent is always used without reconnecting.
+ */
+export const useCaseEvents = (
+  subscription: CaseEventSubscription,
+  onEvent: (event: CaseEvent) => void
+) => {
+  const handlerRef = useRef(onEvent);
+  handlerRef.current = onEvent;
+
+  const complaintKey = (subscription.complaintIds || []).join(',');
+  const districtKey = (subscription.districts || []).join(',');
+
+  useEffect(
+    () =>
+      subscribeToCaseEvents(
+        {
+          complaintIds: complaintKey ? complaintKey.split(',') : [],
+          districts: districtKey ? districtKey.split(',') : [],
+          freezeQueue: subscription.freezeQueue,
+        },
+        (event) => handlerRef.current(event)
+      ),
+    [complaintKey, districtKey, subscription.freezeQueue]
+  );
+};
+
+export default useCaseEvents;
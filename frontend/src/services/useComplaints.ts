@@ -24,6 +24,7 @@ export interface ComplaintCreateData {
   fraud_type: string;
   amount_lost: number;
   accused_account?: string;
+  accused_upi?: string;
   accused_bank?: string;
   transaction_id?: string;
   transaction_date?: string;
@@ -38,9 +39,10 @@ export interface ComplaintUpdateData {
 }
 
 export interface ComplaintListResponse {
-  total: number;
+  total: number | null;
   limit: number;
   offset: number;
+  next_cursor: string | null;
   complaints: Complaint[];
 }
 
@@ -98,6 +100,8 @@ export const useComplaints = () => {
       district?: string;
       limit?: number;
       offset?: number;
+      cursor?: string;
+      includeTotal?: boolean;
     }) => {
       setLoading(true);
       setError(null);
@@ -107,6 +111,9 @@ export const useComplaints = () => {
         if (params?.district) queryParams.append('district', params.district);
         if (params?.limit) queryParams.append('limit', params.limit.toString());
         if (params?.offset) queryParams.append('offset', params.offset.toString());
+        if (params?.cursor) queryParams.append('cursor', params.cursor);
+        // The API counts all matches unless told not to
+        if (params?.includeTotal === false) queryParams.append('include_total', 'false');
 
         const endpoint = `/api/complaints${queryParams.toString() ? `?${queryParams.toString()}` : ''}`;
         const response = await apiClient.get<ComplaintListResponse>(endpoint);